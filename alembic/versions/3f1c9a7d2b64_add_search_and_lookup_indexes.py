@@ -0,0 +1,73 @@
+"""add search and lookup indexes
+
+Revision ID: 3f1c9a7d2b64
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_Event_title_trgm", "Event", [sa.text("lower(title) gin_trgm_ops")], dict(postgresql_using="gin")),
+    ("ix_Event_description_trgm", "Event", [sa.text("lower(description) gin_trgm_ops")], dict(postgresql_using="gin")),
+    ("ix_Tag_name_trgm", "Tag", [sa.text("name gin_trgm_ops")], dict(postgresql_using="gin")),
+    ("ix_Member_event_id", "Member", ["event_id"], {}),
+    ("ix_Member_user_id", "Member", ["user_id"], {}),
+    ("ix_Like_event_id_user_id", "Like", ["event_id", "user_id"], dict(unique=True)),
+    ("ix_Like_user_id", "Like", ["user_id"], {}),
+    ("ix_Ticket_event_ticket_id", "Ticket", ["event_ticket_id"], {}),
+    ("ix_Ticket_user_id", "Ticket", ["user_id"], {}),
+    ("ix_EventTicket_event_id", "EventTicket", ["event_id"], {}),
+    ("ix_EventTag_event_id_tag_id", "EventTag", ["event_id", "tag_id"], dict(unique=True)),
+    ("ix_EventTag_tag_id", "EventTag", ["tag_id"], {}),
+    ("ix_EventAlbum_event_id", "EventAlbum", ["event_id"], {}),
+    ("ix_EventSettings_event_id", "EventSettings", ["event_id"], {}),
+    ("ix_EventRestriction_event_id", "EventRestriction", ["event_id"], {}),
+    ("ix_SearchQuery_user_id", "SearchQuery", ["user_id"], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # unique indexes can't be built over existing duplicates
+    op.execute(
+        'DELETE FROM "Like" a USING "Like" b '
+        'WHERE a.event_id = b.event_id AND a.user_id = b.user_id AND a.id > b.id'
+    )
+    op.execute(
+        'DELETE FROM "EventTag" a USING "EventTag" b '
+        'WHERE a.event_id = b.event_id AND a.tag_id = b.tag_id AND a.id > b.id'
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
@@ -0,0 +1,36 @@
+"""add event like_count
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a93'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "Event",
+        sa.Column("like_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.execute(
+        'UPDATE "Event" e SET like_count = l.likes '
+        'FROM (SELECT event_id, count(*) AS likes FROM "Like" GROUP BY event_id) l '
+        'WHERE e.id = l.event_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("Event", "like_count")
@@ -0,0 +1,63 @@
+"""add feed indexes
+
+Revision ID: 9e3b7a1c6d52
+Revises: 5d9f2b7c4e18
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3b7a1c6d52'
+down_revision: Union[str, None] = '5d9f2b7c4e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_Event_starting_time_id", "Event", ["starting_time", "id"], dict(postgresql_include=["format"])),
+    ("ix_Event_format_starting_time_id", "Event", ["format", "starting_time", "id"], {}),
+    (
+        "ix_EventSettings_event_id_flags", "EventSettings", ["event_id"],
+        dict(postgresql_include=["is_announced", "is_gathering", "is_dropped"])
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs
+            )
+
+        # superseded by the covering index
+        op.drop_index(
+            "ix_EventSettings_event_id", table_name="EventSettings",
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_EventSettings_event_id", "EventSettings", ["event_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
@@ -0,0 +1,57 @@
+"""add unique tag name index
+
+Revision ID: c4a8e1f07d35
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e1f07d35'
+down_revision: Union[str, None] = '8b2e4d6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DUPLICATE_TAGS = (
+    'SELECT id, min(id) OVER (PARTITION BY lower(name)) AS keep_id FROM "Tag"'
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # move events of duplicated tags onto the oldest one, the rest cascade away
+    op.execute(
+        'INSERT INTO "EventTag" (event_id, tag_id) '
+        'SELECT DISTINCT et.event_id, d.keep_id '
+        f'FROM "EventTag" et JOIN ({DUPLICATE_TAGS}) d ON et.tag_id = d.id '
+        'WHERE d.id <> d.keep_id '
+        'ON CONFLICT (event_id, tag_id) DO NOTHING'
+    )
+    op.execute(
+        f'DELETE FROM "Tag" t USING ({DUPLICATE_TAGS}) d '
+        'WHERE t.id = d.id AND d.id <> d.keep_id'
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_Tag_name_lower", "Tag", [sa.text("lower(name)")],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_Tag_name_lower", table_name="Tag",
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -1,8 +1,9 @@
 
-import asyncio
 import fastapi
 import uvicorn
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+from loguru import logger
 
 from sqlalchemy import text
 
@@ -11,37 +12,69 @@ from .endpoint import (
     album_router, settings_router,
     event_ticket_router, member_router,
     tag_router, restriction_router,
-    ticket_router
+    ticket_router, internal_router
 )
 from .updater import Updater
-from .middlewares import CheckAuthMiddleware
+from .middlewares import CheckAuthMiddleware, CompressionMiddleware
 
-from app.database import get_async_session
+from app.database import get_async_session, find_missing_indexes, dispose_engines
+from app.client import open_client_session, close_client_session
+from app.autocomplete import tag_index
+from app.search_history import search_history
+from app.storage import image_pipeline
+from app.profiler import query_profiler
+from app.logger import setup_logger
 
 from config import get_settings
 
 
 @asynccontextmanager
 async def lifespan(app: fastapi.FastAPI):
+    # worker processes are spawned without going through main
+    setup_logger(get_settings().logger.path, get_settings().logger.level)
+
+    await open_client_session()
+
     async with get_async_session() as session:
         await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
         await session.commit()
 
+        for index_name in await find_missing_indexes(session):
+            logger.warning(f"Missing index {index_name}, run `alembic upgrade head`")
+
+    try:
+        async with get_async_session() as session:
+            await tag_index.load(session)
+
+    except Exception as err:
+        logger.error(f"Failed to load tag index, searching tags in database -> {err}")
+
+    tag_index.start(get_settings().autocomplete.reload_delay_seconds)
+    search_history.start()
+
     updater = Updater()
-    task = asyncio.create_task(updater.start())
+    updater.start()
 
     yield
 
-    # to avoid killing task
-    print(task)
+    await updater.stop()
+    await tag_index.stop()
+    await search_history.stop()
+    await query_profiler.stop()
+    await close_client_session()
+    image_pipeline.close()
+    await dispose_engines()
 
 
 app = fastapi.FastAPI(
     title="Swagger",
     root_path=get_settings().app.path,
+    default_response_class=ORJSONResponse if get_settings().app.fast_json else JSONResponse,
     lifespan=lifespan
 )
 app.add_middleware(CheckAuthMiddleware)
+if get_settings().compression.enabled:
+    app.add_middleware(CompressionMiddleware)
 
 app.include_router(event_router)
 app.include_router(like_router)
@@ -52,8 +85,25 @@ app.include_router(member_router)
 app.include_router(tag_router)
 app.include_router(restriction_router)
 app.include_router(ticket_router)
+app.include_router(internal_router)
 
 
 def start_app():
-    settings = get_settings()
-    uvicorn.run(app, host=settings.app.host, port=settings.app.port)
+    settings = get_settings().app
+
+    # the memory backend lives in one process, invalidations would not reach the other workers
+    if settings.workers > 1 and get_settings().cache.backend != "redis":
+        raise RuntimeError("APP__WORKERS > 1 requires CACHE__BACKEND=redis")
+
+    # an import string lets uvicorn load the app in every worker process
+    uvicorn.run(
+        "app.app:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        loop=settings.loop,
+        http=settings.http,
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.timeout_keep_alive,
+        timeout_graceful_shutdown=settings.timeout_graceful_shutdown,
+    )
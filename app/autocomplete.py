@@ -0,0 +1,164 @@
+import asyncio
+import bisect
+import heapq
+from collections import Counter
+
+from loguru import logger
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.model import Tag, EventTag
+from app.database import get_background_session
+
+
+# same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+
+def gen_trigrams(value: str) -> set[str]:
+    trigrams = set()
+
+    for word in value.lower().split():
+        word = f"  {word} "
+        trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+
+    return trigrams
+
+
+class TagIndex:
+    def __init__(self):
+        self.log = logger.bind(classname=self.__class__.__name__)
+
+        self.loaded = False
+
+        # keyed by lower(name), the rule of the ON CONFLICT (lower(name)) tag upsert
+        self.names: list[str] = []
+        self.display_names: dict[str, str] = {}
+        self.ids: dict[str, int] = {}
+        self.names_by_id: dict[int, str] = {}
+        self.popularity: Counter[str] = Counter()
+
+        self.trigrams: dict[str, set[str]] = {}
+        self.trigram_counts: dict[str, int] = {}
+
+        self.task: asyncio.Task | None = None
+
+    async def load(self, session: AsyncSession):
+        rows = (await session.execute(
+            select(Tag.id, Tag.name, func.count(EventTag.id))
+            .outerjoin(EventTag, EventTag.tag_id == Tag.id)
+            .group_by(Tag.id)
+        )).all()
+
+        self.names = []
+        self.display_names = {}
+        self.ids = {}
+        self.names_by_id = {}
+        self.popularity = Counter()
+        self.trigrams = {}
+        self.trigram_counts = {}
+
+        for tag_id, name, events in rows:
+            self.add_tag(tag_id, name, sort=False)
+            self.popularity[name.lower()] += events
+
+        self.names.sort()
+        self.loaded = True
+
+        self.log.info(f"Loaded {len(self.names)} tags")
+
+    def add_tag(self, tag_id: int, name: str, sort: bool = True):
+        display_name, name = name, name.lower()
+        if name in self.ids:
+            return
+
+        self.display_names[name] = display_name
+        self.ids[name] = tag_id
+        self.names_by_id[tag_id] = name
+
+        if sort:
+            bisect.insort(self.names, name)
+        else:
+            self.names.append(name)
+
+        trigrams = gen_trigrams(name)
+        self.trigram_counts[name] = len(trigrams)
+        for trigram in trigrams:
+            self.trigrams.setdefault(trigram, set()).add(name)
+
+    def update(self, tags: dict[str, int], added: list[int], removed: list[int]):
+        if not self.loaded:
+            return
+
+        for name, tag_id in tags.items():
+            self.add_tag(tag_id, name)
+
+        for tag_id in added:
+            if tag_id in self.names_by_id:
+                self.popularity[self.names_by_id[tag_id]] += 1
+
+        for tag_id in removed:
+            if tag_id in self.names_by_id:
+                self.popularity[self.names_by_id[tag_id]] -= 1
+
+    def search(self, query: str, limit: int) -> list[tuple[int, str]]:
+        query = query.lower()
+
+        start = bisect.bisect_left(self.names, query)
+        end = bisect.bisect_left(self.names, query + "\uffff", lo=start)
+
+        found = heapq.nlargest(
+            limit,
+            self.names[start:end],
+            key=lambda name: (name == query, self.popularity[name], -len(name))
+        )
+
+        if len(found) < limit:
+            query_trigrams = gen_trigrams(query)
+
+            shared = Counter()
+            for trigram in query_trigrams:
+                shared.update(self.trigrams.get(trigram, ()))
+
+            prefixed = set(found)
+
+            similar = []
+            for name, count in shared.items():
+                if name in prefixed:
+                    continue
+
+                similarity = count / (len(query_trigrams) + self.trigram_counts[name] - count)
+                if similarity >= SIMILARITY_THRESHOLD:
+                    similar.append((similarity, self.popularity[name], name))
+
+            found.extend(
+                name
+                for _, _, name in heapq.nlargest(limit - len(found), similar)
+            )
+
+        return [(self.ids[name], self.display_names[name]) for name in found]
+
+    async def run(self, delay: float):
+        # other workers change tags too, only a reload picks their changes up
+        while True:
+            await asyncio.sleep(delay)
+
+            try:
+                async with get_background_session() as session:
+                    await self.load(session)
+
+            except Exception as err:
+                self.log.error(f"Failed to reload tags -> {err}")
+
+    def start(self, delay: float):
+        self.task = asyncio.create_task(self.run(delay))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+
+tag_index = TagIndex()
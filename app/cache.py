@@ -0,0 +1,175 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from loguru import logger
+
+from config import get_settings
+
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    async def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return [self.cache.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes):
+        self.cache.set(key, value)
+
+    async def set_many(self, items: dict[str, bytes]):
+        for key, value in items.items():
+            self.cache.set(key, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.cache.delete(key)
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float, prefix: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as err:
+            raise RuntimeError("redis package is required for the redis cache backend") from err
+
+        self.log = logger.bind(classname=self.__class__.__name__)
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            value = await self.client.get(f"{self.prefix}:{key}")
+
+        except Exception as err:
+            self.log.warning(f"Failed to get {key} -> {err!r}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+
+        try:
+            values = await self.client.mget([f"{self.prefix}:{key}" for key in keys])
+
+        except Exception as err:
+            self.log.warning(f"Failed to get {len(keys)} keys -> {err!r}")
+            values = [None] * len(keys)
+
+        hits = sum(value is not None for value in values)
+        self.hits += hits
+        self.misses += len(values) - hits
+
+        return values
+
+    async def set(self, key: str, value: bytes):
+        try:
+            await self.client.set(f"{self.prefix}:{key}", value, px=int(self.ttl * 1000))
+
+        except Exception as err:
+            self.log.warning(f"Failed to set {key} -> {err!r}")
+
+    async def set_many(self, items: dict[str, bytes]):
+        if not items:
+            return
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipeline:
+                for key, value in items.items():
+                    pipeline.set(f"{self.prefix}:{key}", value, px=int(self.ttl * 1000))
+                await pipeline.execute()
+
+        except Exception as err:
+            self.log.warning(f"Failed to set {len(items)} keys -> {err!r}")
+
+    async def delete(self, *keys: str):
+        if not keys:
+            return
+
+        try:
+            await self.client.delete(*[f"{self.prefix}:{key}" for key in keys])
+
+        except Exception as err:
+            self.log.warning(f"Failed to delete {keys} -> {err!r}")
+
+
+def new_cache_backend(prefix: str) -> MemoryCacheBackend | RedisCacheBackend:
+    settings = get_settings().cache
+
+    if settings.backend == "redis":
+        return RedisCacheBackend(url=settings.url, ttl=settings.ttl_seconds, prefix=prefix)
+
+    return MemoryCacheBackend(maxsize=settings.size, ttl=settings.ttl_seconds)
+
+
+event_cache = new_cache_backend("event")
+
+
+async def invalidate_events(*event_ids: int):
+    await event_cache.delete(*[str(event_id) for event_id in event_ids])
@@ -0,0 +1,37 @@
+import aiohttp
+
+from config import get_settings
+
+
+_CLIENT_SESSION: aiohttp.ClientSession | None = None
+
+
+async def open_client_session() -> aiohttp.ClientSession:
+    global _CLIENT_SESSION
+
+    settings = get_settings().services
+    _CLIENT_SESSION = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=settings.pool_size,
+            ttl_dns_cache=300,
+        ),
+        timeout=aiohttp.ClientTimeout(total=settings.timeout_seconds),
+        # requests carry the caller's cookies, they must not be shared between users
+        cookie_jar=aiohttp.DummyCookieJar(),
+    )
+    return _CLIENT_SESSION
+
+
+async def close_client_session():
+    global _CLIENT_SESSION
+
+    if _CLIENT_SESSION is not None:
+        await _CLIENT_SESSION.close()
+        _CLIENT_SESSION = None
+
+
+def get_client_session() -> aiohttp.ClientSession:
+    if _CLIENT_SESSION is None:
+        raise RuntimeError("Client session is not opened")
+
+    return _CLIENT_SESSION
@@ -1,29 +1,136 @@
+import time
 
+from sqlalchemy import text
 from sqlalchemy.engine.url import URL
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.model import BaseModel
+from app.metrics import instrument_engine
 
 from config import get_settings
 
 
-def new_async_engine(uri: URL) -> AsyncEngine:
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        AsyncAdaptedQueuePool.__init__(self, *args, **kwargs)
+
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+
+        try:
+            return AsyncAdaptedQueuePool._do_get(self)
+
+        finally:
+            waited = time.perf_counter() - started
+
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def gen_connect_args() -> dict:
+    # the asyncpg dialect prepares through connection.prepare(), which bypasses asyncpg's own
+    # statement_cache_size, the dialect keeps its own cache sized by prepared_statement_cache_size
+    return {"prepared_statement_cache_size": get_settings().database.prepared_statement_cache_size}
+
+
+def new_async_engine(uri: URL, pool_size: int, max_overflow: int) -> AsyncEngine:
+    settings = get_settings().database
+
     return create_async_engine(
         uri,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30.0,
-        pool_recycle=600,
+        poolclass=MeteredQueuePool,
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        connect_args=gen_connect_args(),
     )
 
 
-_ASYNC_ENGINE = new_async_engine(get_settings().sqlalchemy_database_uri)
+_ASYNC_ENGINE = new_async_engine(
+    get_settings().sqlalchemy_database_uri,
+    pool_size=get_settings().database.pool_size,
+    max_overflow=get_settings().database.max_overflow,
+)
 _ASYNC_SESSIONMAKER = async_sessionmaker(_ASYNC_ENGINE, expire_on_commit=False)
 
+# updater and other background tasks never compete with request handlers
+_BACKGROUND_ENGINE = new_async_engine(
+    get_settings().sqlalchemy_database_uri,
+    pool_size=get_settings().database.background_pool_size,
+    max_overflow=get_settings().database.background_max_overflow,
+)
+_BACKGROUND_SESSIONMAKER = async_sessionmaker(_BACKGROUND_ENGINE, expire_on_commit=False)
+
+# long held connections (the updater leader lock) open their own backend instead of taking a pool slot
+_UNPOOLED_ENGINE = create_async_engine(
+    get_settings().sqlalchemy_database_uri,
+    poolclass=NullPool,
+    connect_args=gen_connect_args(),
+)
+
+instrument_engine(_ASYNC_ENGINE, "default")
+instrument_engine(_BACKGROUND_ENGINE, "background")
+
 
 def get_async_session() -> AsyncSession:
     return _ASYNC_SESSIONMAKER()
+
+
+def get_background_session() -> AsyncSession:
+    return _BACKGROUND_SESSIONMAKER()
+
+
+def connect_unpooled() -> AsyncConnection:
+    # a dedicated connection outside of every pool, it is closed together with the caller's block
+    return _UNPOOLED_ENGINE.connect()
+
+
+async def dispose_engines():
+    await _ASYNC_ENGINE.dispose()
+    await _BACKGROUND_ENGINE.dispose()
+    await _UNPOOLED_ENGINE.dispose()
+
+
+def get_pool_metrics() -> dict[str, dict]:
+    metrics = {}
+
+    for name, engine in (("default", _ASYNC_ENGINE), ("background", _BACKGROUND_ENGINE)):
+        pool = engine.pool
+        metrics[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkouts": pool.checkouts,
+            "wait_seconds": pool.wait_seconds,
+            "max_wait_seconds": pool.max_wait_seconds,
+        }
+
+    return metrics
+
+
+async def find_missing_indexes(session: AsyncSession) -> list[str]:
+    existing = set((await session.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+    )).scalars().all())
+
+    return sorted(
+        index.name
+        for table in BaseModel.metadata.tables.values()
+        for index in table.indexes
+        if index.name not in existing
+    )
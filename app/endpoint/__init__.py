@@ -8,3 +8,4 @@ from .ticket import ticket_router
 from .member import member_router
 from .tag import tag_router
 from .restriction import restriction_router
+from .internal import internal_router
@@ -1,24 +1,148 @@
-
+import anyio
+import asyncio
 import base64
+import binascii
 import os
+import re
 import fastapi
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
-from uuid import uuid4
 from loguru import logger
 
 from sqlalchemy import select, and_
 
 from app.model import EventAlbum
-from app.enum import ResponseStatus
+from app.enum import ResponseStatus, ImageSize
 
 from app.schema.request import AddAlbumRequest
 from app.schema.response import AddAlbumResponse, AddAlbumData
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.cache import invalidate_events
+from app.etag import strong_etag, is_not_modified
+from app.storage import (
+    InvalidImageError, image_pipeline, save_image, remove_image,
+    get_image_path, get_image_url, get_derivative_name, get_media_type
+)
+
+from config import get_settings
+
+
+album_router = fastapi.APIRouter(prefix="/album", tags=["album"], route_class=MeteredRoute)
+
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def decode_file(data: str) -> bytes:
+    try:
+        return base64.b64decode(data)
+
+    except binascii.Error as err:
+        raise InvalidImageError("Image is not valid base64") from err
+
+
+async def single_chunk(data: bytes):
+    yield data
+
+
+def resolve_image(album_id: str, size: ImageSize) -> tuple[str, os.stat_result, bool]:
+    name = os.path.basename(album_id)
+
+    for candidate in (get_derivative_name(name, size), name):
+        path = get_image_path(candidate)
+        if os.path.isfile(path):
+            return path, os.stat(path), True
+
+    path = get_image_path("404.jpg")
+    return path, os.stat(path), False
+
+
+def parse_range(header: str, file_size: int) -> tuple[int, int] | None:
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if not match or not any(match.groups()):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        start, end = max(file_size - int(end), 0), file_size - 1
+
+    else:
+        start, end = int(start), min(int(end), file_size - 1) if end else file_size - 1
+
+    if start > end or start >= file_size:
+        return None
+
+    return start, end
+
+
+async def read_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def discard_image(img: str):
+    # identical uploads share one file, keep it while another album still shows it
+    try:
+        async with get_async_session() as session:
+            shared = (await session.execute(
+                select(EventAlbum.id)
+                .where(EventAlbum.img == img)
+                .limit(1)
+            )).first()
+
+    except Exception as err:
+        logger.error(f"Failed to check album references of {img}, keeping the file -> {err}")
+        return
+
+    if shared is None:
+        await asyncio.to_thread(remove_image, img)
+
+
+async def store_image(chunks) -> str:
+    img = await save_image(chunks)
+
+    try:
+        await image_pipeline.create_derivatives(img)
+
+    except BaseException:
+        await discard_image(img)
+        raise
+
+    return img
+
 
+async def record_album(event_id: int, img: str):
+    # the file is already in place, the session is only held for the swap
+    async with get_async_session() as session:
+        album = (await session.execute(
+            select(EventAlbum)
+            .where(
+                and_(
+                    EventAlbum.event_id == event_id,
+                )
+            )
+        )).scalars().one_or_none()
+
+        if album:
+            await session.delete(album)
 
-album_router = fastapi.APIRouter(prefix="/album", tags=["album"])
+        session.add(EventAlbum(event_id=event_id, img=img))
+
+        await session.commit()
+
+    await invalidate_events(event_id)
 
 
 @album_router.get(
@@ -28,13 +152,47 @@ album_router = fastapi.APIRouter(prefix="/album", tags=["album"])
 )
 async def get_album(
     album_id: str,
+    request: fastapi.Request,
+    size: ImageSize = ImageSize.full,
 ):
 
-    file_path = f"./resources/images/{album_id}"
-    if not os.path.isfile(file_path):
-        file_path = f"./resources/images/404.jpg"
+    file_path, stat, found = await asyncio.to_thread(resolve_image, album_id, size)
+    media_type = get_media_type(file_path)
+
+    # stored names never get new content, so their variants can be cached forever
+    etag = strong_etag(f"{os.path.basename(file_path)}:{stat.st_size}".encode())
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable" if found else "no-cache",
+    }
+
+    if is_not_modified(request, etag):
+        return fastapi.Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            return fastapi.Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"}
+            )
+
+        start, end = byte_range
+        return StreamingResponse(
+            read_range(file_path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                "Content-Length": str(end - start + 1),
+            }
+        )
 
-    return FileResponse(path=file_path, media_type="image/jpeg", filename=f"image.jpg")
+    return FileResponse(path=file_path, media_type=media_type, headers=headers, stat_result=stat)
 
 
 @album_router.post(
@@ -47,30 +205,58 @@ async def add_album(
 ) -> AddAlbumResponse:
 
     try:
-        async with get_async_session() as session:
-            album = (await session.execute(
-                select(EventAlbum)
-                .where(
-                    and_(
-                        EventAlbum.event_id == data.event_id,
-                    )
-                )
-            )).scalars().one_or_none()
+        file = await asyncio.to_thread(decode_file, data.file)
+        img = await store_image(single_chunk(file))
 
-            if album:
-                await session.delete(album)
+        await record_album(data.event_id, img)
 
-            album = EventAlbum(
-                event_id=data.event_id,
-                img=uuid4().hex
-            )
+    except InvalidImageError as err:
+        return AddAlbumResponse(
+            status=ResponseStatus.invalid_file,
+            description=str(err)
+        )
 
-            with open(f"./resources/images/{album.img}", "wb") as f:
-                f.write(base64.b64decode(data.file))
+    except Exception as err:
+        logger.exception(err)
+        return AddAlbumResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        )
+
+    return AddAlbumResponse(
+        data=AddAlbumData(
+            url=get_image_url(img)
+        )
+    )
+
+
+@album_router.put(
+    path="/{event_id}",
+    response_model=AddAlbumResponse,
+    description="Add/Replace album image, streamed as the raw request body",
+)
+async def upload_album(
+    event_id: int,
+    request: fastapi.Request
+) -> AddAlbumResponse:
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > get_settings().album.max_size_bytes:
+        return AddAlbumResponse(
+            status=ResponseStatus.invalid_file,
+            description=f"Image is larger than {get_settings().album.max_size_bytes} bytes"
+        )
 
-            session.add(album)
+    try:
+        img = await store_image(request.stream())
+
+        await record_album(event_id, img)
 
-            await session.commit()
+    except InvalidImageError as err:
+        return AddAlbumResponse(
+            status=ResponseStatus.invalid_file,
+            description=str(err)
+        )
 
     except Exception as err:
         logger.exception(err)
@@ -81,6 +267,6 @@ async def add_album(
 
     return AddAlbumResponse(
         data=AddAlbumData(
-            url=f"https://bots.innova.ua/api/event/album/{album.img}"
+            url=get_image_url(img)
         )
     )
@@ -1,13 +1,16 @@
 
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator
 import fastapi
 import re
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
-from sqlalchemy import update, select, or_, func, and_, delete
+from sqlalchemy import update, select, or_, func, and_, delete, literal, union_all, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.enum import MemberRole, ResponseStatus
+from app.enum import MemberRole, ResponseStatus, ImageSize, EventFormat
 from app.model import Event, Member, EventSettings, Tag, EventTag, Like, EventTicket, EventAlbum, Ticket, SearchQuery
 from app.endpoint.tag import update_tags
 
@@ -19,19 +22,29 @@ from app.schema.response import (
     GetEventResponse, GetManyEventsResponse,
     DeleteEventResponse, GetMyStatsResponse,
     GetEventStatsResponse, GetUserEventsResponse,
-    GetSearchHistoryResponse, DropSearchHistoryResponse
+    GetSearchHistoryResponse, DropSearchHistoryResponse,
+    GetEventsBatchResponse, GetCompactEventsResponse
 )
 from app.schema.response import (
     CreateEventData, UpdateEventData,
     GetEventData, GetEventTicketData,
     GetMyStatsData, GetEventStatsData,
-    GetUserEventsData, GetSearchHistoryData
+    GetUserEventsData, GetSearchHistoryData,
+    GetEventsBatchData, GetEventListData
 )
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.pagination import encode_cursor, decode_cursor
+from app.cache import event_cache, invalidate_events
+from app.etag import strong_etag, weak_etag, is_not_modified
+from app.search_history import search_history
+from app.stats import gen_owned_events_query, gen_total_stats_query
+from app.storage import get_image_url
+from app.responses import model_response
 
 
-event_router = fastapi.APIRouter(tags=['event'])
+event_router = fastapi.APIRouter(tags=['event'], route_class=MeteredRoute)
 
 
 @event_router.post(
@@ -125,6 +138,8 @@ async def update_event(
 
             await session.commit()
 
+        await invalidate_events(data.id)
+
     except Exception as err:
         logger.exception(err)
         return UpdateEventResponse(
@@ -139,61 +154,114 @@ async def update_event(
     )
 
 
-async def gen_response_event(event: Event, session: AsyncSession):
-    async with get_async_session() as session:
-        event_tickets = (await session.execute(
-            select(EventTicket)
-            .where(
-                EventTicket.event_id == event.id
-            )
-        )).scalars().all()
-        album = (await session.execute(
-            select(EventAlbum)
-            .where(
-                EventAlbum.event_id == event.id
-            )
-        )).scalars().all()
-        event_tags = (await session.execute(
-            select(EventTag)
-            .where(
-                EventTag.event_id == event.id
-            )
-        )).scalars().all()
-        tags = (await session.execute(
-            select(Tag)
-            .where(
-                Tag.id.in_(map(lambda x: x.tag_id, event_tags))
-            )
-        )).scalars().all()
-        likes = (await session.execute(
-            select(func.count()).select_from(Like).where(Like.event_id == event.id)
-        )).scalar()
+def gen_event_dict(event: Event) -> dict:
+    event_dict = {
+        key: value
+        for key, value in event.__dict__.items()
+        if not key.startswith("_")
+    }
 
-    event_dict = event.__dict__
-    if event_dict["starting_time"]:
+    if event.starting_time:
         event_dict["starting_time"] = round(event.starting_time.timestamp())
 
-    if event_dict["announced_at"]:
+    if event.announced_at:
         event_dict["announced_at"] = round(event.announced_at.timestamp())
 
-    return GetEventData(
-        **event_dict,
-        likes=likes,
-        bought=0,
-        tags=list(map(lambda x: f"{x.name}", tags)),
-        album=list(map(lambda x: f"https://bots.innova.ua/api/event/album/{x.img}", album)),
-        event_tickets=[
-            GetEventTicketData(
-                id=event_ticket.id,
-                title=event_ticket.title,
-                description=event_ticket.description,
-                price=event_ticket.price,
-                stock=event_ticket.stock,
-                amount=event_ticket.amount
+    return event_dict
+
+
+async def gen_response_events(
+    events: list[Event],
+    session: AsyncSession,
+    album_size: ImageSize = ImageSize.thumb,
+    compact: bool = False
+) -> list[GetEventData] | list[GetEventListData]:
+    event_ids = list({event.id for event in events})
+    if not event_ids:
+        return []
+
+    event_tickets = defaultdict(list)
+    for event_ticket in (await session.execute(
+        select(EventTicket)
+        .where(EventTicket.event_id.in_(event_ids))
+        .order_by(EventTicket.id)
+    )).scalars():
+        event_tickets[event_ticket.event_id].append(event_ticket)
+
+    albums = defaultdict(list)
+    if not compact:
+        for event_id, img in (await session.execute(
+            select(EventAlbum.event_id, EventAlbum.img)
+            .where(EventAlbum.event_id.in_(event_ids))
+            .order_by(EventAlbum.id)
+        )).all():
+            albums[event_id].append(img)
+
+    tags = defaultdict(list)
+    for event_id, name in (await session.execute(
+        select(EventTag.event_id, Tag.name)
+        .join(Tag, Tag.id == EventTag.tag_id)
+        .where(EventTag.event_id.in_(event_ids))
+        .order_by(EventTag.id)
+    )).all():
+        tags[event_id].append(name)
+
+    response_data = []
+    for event in events:
+        event_dict = gen_event_dict(event)
+        event_dict.update(
+            likes=event.like_count,
+            bought=0,
+            tags=tags[event.id],
+            tickets=[
+                GetEventTicketData(
+                    id=event_ticket.id,
+                    title=event_ticket.title,
+                    description=event_ticket.description,
+                    price=event_ticket.price,
+                    stock=event_ticket.stock,
+                    amount=event_ticket.amount
+                )
+                for event_ticket in event_tickets[event.id]
+            ]
+        )
+
+        if compact:
+            event_dict.pop("description")
+            response_data.append(GetEventListData(**event_dict))
+
+        else:
+            response_data.append(GetEventData(
+                **event_dict,
+                album=[get_image_url(img, album_size) for img in albums[event.id]]
+            ))
+
+    return response_data
+
+
+async def fetch_events_version(events: list[Event], session: AsyncSession) -> tuple:
+    event_ids = list({event.id for event in events})
+    if not event_ids:
+        return ()
+
+    # deleted child rows do not move max(update_time), their counts do
+    rows = (await session.execute(
+        union_all(*[
+            select(
+                literal(model.__tablename__).label("table"),
+                func.count(model.id),
+                func.max(model.update_time)
             )
-            for event_ticket in event_tickets
-        ]
-    )
+            .where(model.event_id.in_(event_ids))
+            for model in (EventTicket, EventAlbum, EventTag)
+        ])
+    )).all()
+
+    return max(event.update_time for event in events), tuple(sorted(tuple(row) for row in rows))
+
+
+async def gen_response_event(event: Event, session: AsyncSession) -> GetEventData:
+    return (await gen_response_events([event], session, album_size=ImageSize.full))[0]
 
 
 @event_router.get(
@@ -202,13 +270,24 @@ async def gen_response_event(event: Event, session: AsyncSession):
     description="Get event",
 )
 async def get_event(
-    id: int
+    id: int,
+    request: fastapi.Request,
+    response: fastapi.Response
 ) -> GetEventResponse:
 
     try:
-        async with get_async_session() as session:
-            event = await session.get(Event, id)
-            response_data = await gen_response_event(event, session)
+        cached = await event_cache.get(str(id))
+
+        if cached is None:
+            async with get_async_session() as session:
+                event = await session.get(Event, id)
+                response_data = await gen_response_event(event, session)
+
+            cached = response_data.model_dump_json().encode()
+            await event_cache.set(str(id), cached)
+
+        else:
+            response_data = GetEventData.model_validate_json(cached)
 
     except Exception as err:
         logger.exception(err)
@@ -217,8 +296,96 @@ async def get_event(
             description=str(err)
         )
 
-    return GetEventResponse(
-        data=response_data
+    etag = strong_etag(cached)
+    if is_not_modified(request, etag):
+        return fastapi.Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+
+    return model_response(
+        GetEventResponse(
+            data=response_data
+        ),
+        headers={"ETag": etag}
+    )
+
+
+MANY_EVENTS_LIMIT = 300
+
+
+def parse_event_ids(ids: str) -> list[int]:
+    event_ids = [int(event_id) for event_id in ids.split(",") if event_id.strip()]
+    if len(event_ids) > MANY_EVENTS_LIMIT:
+        raise ValueError(f"At most {MANY_EVENTS_LIMIT} ids can be requested at once")
+
+    # repeated ids are answered once, in the position of their first occurrence
+    return list(dict.fromkeys(event_ids))
+
+
+@event_router.get(
+    path="/many",
+    response_model=GetEventsBatchResponse,
+    description="Get events by comma separated ids, in the requested order",
+)
+async def get_many_events(
+    ids: str,
+    request: fastapi.Request,
+    response: fastapi.Response
+) -> GetEventsBatchResponse:
+
+    try:
+        event_ids = parse_event_ids(ids)
+
+    except ValueError as err:
+        return GetEventsBatchResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        )
+
+    try:
+        cached = dict(zip(event_ids, await event_cache.get_many([str(event_id) for event_id in event_ids])))
+
+        missed_ids = [event_id for event_id, value in cached.items() if value is None]
+        if missed_ids:
+            async with get_async_session() as session:
+                events = (await session.execute(
+                    select(Event)
+                    .where(Event.id.in_(missed_ids))
+                )).scalars().all()
+
+                # shares cache entries with the single event path, so albums stay full size
+                fetched = {
+                    data.id: data.model_dump_json().encode()
+                    for data in await gen_response_events(events, session, album_size=ImageSize.full)
+                }
+
+            await event_cache.set_many({str(event_id): value for event_id, value in fetched.items()})
+            cached.update(fetched)
+
+        found = [(event_id, cached[event_id]) for event_id in event_ids if cached[event_id] is not None]
+        response_data = GetEventsBatchData(
+            events=[GetEventData.model_validate_json(value) for _, value in found],
+            missing=[event_id for event_id in event_ids if cached[event_id] is None]
+        )
+
+    except Exception as err:
+        logger.exception(err)
+        return GetEventsBatchResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        )
+
+    etag = strong_etag(b"\n".join(value for _, value in found))
+    if is_not_modified(request, etag):
+        return fastapi.Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+
+    return model_response(
+        GetEventsBatchResponse(
+            data=response_data
+        ),
+        headers={"ETag": etag}
     )
 
 
@@ -237,6 +404,8 @@ async def delete_event(
             await session.delete(event)
             await session.commit()
 
+        await invalidate_events(id)
+
     except Exception as err:
         logger.exception(err)
         return DeleteEventResponse(
@@ -249,12 +418,14 @@ async def delete_event(
 
 @event_router.get(
     path="/mine",
-    response_model=GetManyEventsResponse,
-    description="Get my events",
+    response_model=GetManyEventsResponse | GetCompactEventsResponse,
+    description="Get my events, compact=true leaves out descriptions and albums",
 )
 async def get_mine_events(
     request: fastapi.Request,
-) -> GetManyEventsResponse:
+    response: fastapi.Response,
+    compact: bool = False
+) -> GetManyEventsResponse | GetCompactEventsResponse:
 
     response_data = []
 
@@ -278,8 +449,15 @@ async def get_mine_events(
                 )
             )).scalars().all()
 
-            for event in events:
-                response_data.append(await gen_response_event(event, session))
+            etag = weak_etag(
+                compact,
+                sorted(event.id for event in events),
+                await fetch_events_version(events, session)
+            )
+            if is_not_modified(request, etag):
+                return fastapi.Response(status_code=304, headers={"ETag": etag})
+
+            response_data = await gen_response_events(events, session, compact=compact)
 
     except Exception as err:
         logger.exception(err)
@@ -288,74 +466,277 @@ async def get_mine_events(
             description=str(err)
         )
 
-    return GetManyEventsResponse(
-        data=response_data
+    response.headers["ETag"] = etag
+
+    response_model = GetCompactEventsResponse if compact else GetManyEventsResponse
+    return model_response(
+        response_model(
+            data=response_data
+        ),
+        headers={"ETag": etag}
+    )
+
+
+USER_EVENT_LISTS = ("owned", "appreciated", "acquired")
+
+
+def gen_user_events_statement(user_id: str, cursors: dict[str, str | None], limit: int):
+    lists = {
+        "owned": (
+            Member.event_id,
+            select(literal("owned").label("list"), Member.event_id.label("event_id"))
+            .where(
+                and_(
+                    Member.user_id == user_id,
+                    Member.role == MemberRole.owner
+                )
+            )
+        ),
+        "appreciated": (
+            Like.event_id,
+            select(literal("appreciated").label("list"), Like.event_id.label("event_id"))
+            .where(Like.user_id == user_id)
+        ),
+        "acquired": (
+            EventTicket.event_id,
+            select(literal("acquired").label("list"), EventTicket.event_id.label("event_id"))
+            .join(Ticket, Ticket.event_ticket_id == EventTicket.id)
+            .where(Ticket.user_id == user_id)
+            .distinct()
+        ),
+    }
+
+    statements = []
+    for name, (column, statement) in lists.items():
+        if cursors.get(name):
+            cursor_id, = decode_cursor(cursors[name], 1)
+            statement = statement.where(column < cursor_id)
+
+        statements.append(statement)
+
+    events = union_all(*statements).subquery()
+    ranked = (
+        select(
+            events.c.list,
+            events.c.event_id,
+            func.row_number().over(
+                partition_by=events.c.list,
+                order_by=events.c.event_id.desc()
+            ).label("position")
+        )
+        .subquery()
+    )
+
+    return (
+        select(ranked.c.list, Event)
+        .join(Event, Event.id == ranked.c.event_id)
+        .where(ranked.c.position <= limit + 1)
+        .order_by(ranked.c.list, ranked.c.position)
     )
 
 
 @event_router.get(
     path="/user",
     response_model=GetUserEventsResponse,
-    description="Get owned, appreciated and acquired events",
+    description="Get owned, appreciated and acquired events, "
+                "each list is paginated by its own cursor",
 )
 async def get_user_events(
     request: fastapi.Request,
+    response: fastapi.Response,
+    limit: int = fastapi.Query(default=20, ge=1, le=100),
+    owned_cursor: str | None = None,
+    appreciated_cursor: str | None = None,
+    acquired_cursor: str | None = None,
 ) -> GetUserEventsResponse:
 
-    owned = []
-    appreciated = []
-    acquired = []
+    lists = {name: [] for name in USER_EVENT_LISTS}
+    cursors = {
+        "owned": owned_cursor,
+        "appreciated": appreciated_cursor,
+        "acquired": acquired_cursor,
+    }
 
     try:
         async with get_async_session() as session:
-            owners = (await session.execute(
-                select(Member)
-                .where(
-                    and_(
-                        Member.user_id == request.state.user_id,
-                        Member.role == MemberRole.owner
-                    )
-                )
-            )).scalars().all()
-            event_ids = map(lambda x: x.event_id, owners)
+            rows = (await session.execute(
+                gen_user_events_statement(request.state.user_id, cursors, limit)
+            )).all()
+
+            for name, event in rows:
+                lists[name].append(event)
+
+            for name, events in lists.items():
+                cursors[name] = None
+                if len(events) > limit:
+                    del events[limit:]
+                    cursors[name] = encode_cursor(events[-1].id)
+
+            # events shared between lists are hydrated once
+            events = {
+                event.id: event
+                for events in lists.values()
+                for event in events
+            }
+
+            etag = weak_etag(
+                {name: [event.id for event in events] for name, events in lists.items()},
+                await fetch_events_version(list(events.values()), session)
+            )
+            if is_not_modified(request, etag):
+                return fastapi.Response(status_code=304, headers={"ETag": etag})
 
-            events = (await session.execute(
-                select(Event)
-                .where(
-                    Event.id.in_(event_ids)
+            response_data = {
+                data.id: data
+                for data in await gen_response_events(list(events.values()), session)
+            }
+
+    except Exception as err:
+        logger.exception(err)
+        return GetUserEventsResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        )
+
+    response.headers["ETag"] = etag
+
+    return model_response(
+        GetUserEventsResponse(
+            data=GetUserEventsData(
+                **{
+                    name: [response_data[event.id] for event in events]
+                    for name, events in lists.items()
+                },
+                owned_cursor=cursors["owned"],
+                appreciated_cursor=cursors["appreciated"],
+                acquired_cursor=cursors["acquired"]
+            )
+        ),
+        headers={"ETag": etag}
+    )
+
+
+def gen_feed_statement(
+    format: EventFormat | None = None,
+    tag: str | None = None,
+    starting_from: datetime | None = None,
+    starting_to: datetime | None = None,
+    is_announced: bool | None = None,
+    is_gathering: bool | None = None,
+    is_dropped: bool | None = None,
+    cursor: str | None = None
+):
+    statement = select(Event)
+    conditions = [Event.starting_time.is_not(None)]
+
+    if format is not None:
+        conditions.append(Event.format == format)
+
+    if starting_from is not None:
+        conditions.append(Event.starting_time >= starting_from)
+
+    if starting_to is not None:
+        conditions.append(Event.starting_time < starting_to)
+
+    flags = {
+        EventSettings.is_announced: is_announced,
+        EventSettings.is_gathering: is_gathering,
+        EventSettings.is_dropped: is_dropped,
+    }
+    if any(value is not None for value in flags.values()):
+        statement = statement.join(EventSettings, EventSettings.event_id == Event.id)
+        conditions.extend(
+            column == value
+            for column, value in flags.items()
+            if value is not None
+        )
+
+    if tag:
+        conditions.append(
+            select(EventTag.id)
+            .join(Tag, Tag.id == EventTag.tag_id)
+            .where(
+                and_(
+                    EventTag.event_id == Event.id,
+                    func.lower(Tag.name) == tag.strip().lstrip("#").lower()
                 )
-            )).scalars().all()
+            )
+            .exists()
+        )
 
-            for event in events:
-                owned.append(await gen_response_event(event, session))
+    if cursor:
+        cursor_time, cursor_id = decode_cursor(cursor, 2)
+        conditions.append(
+            tuple_(Event.starting_time, Event.id) > tuple_(datetime.fromisoformat(cursor_time), cursor_id)
+        )
 
-            likes = (await session.execute(
-                select(Like)
-                .where(Like.user_id == request.state.user_id)
-            )).scalars().all()
-            event_ids = list(map(lambda x: x.event_id, likes))
+    return (
+        statement
+        .where(*conditions)
+        .order_by(Event.starting_time, Event.id)
+    )
+
+
+@event_router.get(
+    path="/feed",
+    response_model=GetManyEventsResponse | GetCompactEventsResponse,
+    description="Get events ordered by starting time. "
+                "starting_from defaults to now, timestamps are unix seconds. "
+                "Pass the returned cursor to get the next page, "
+                "compact=true leaves out descriptions and albums",
+)
+async def get_feed_events(
+    request: fastapi.Request,
+    response: fastapi.Response,
+    format: EventFormat | None = None,
+    tag: str | None = None,
+    starting_from: int | None = None,
+    starting_to: int | None = None,
+    is_announced: bool | None = None,
+    is_gathering: bool | None = None,
+    is_dropped: bool | None = False,
+    cursor: str | None = None,
+    limit: int = fastapi.Query(default=20, ge=1, le=100),
+    compact: bool = False
+) -> GetManyEventsResponse | GetCompactEventsResponse:
 
+    try:
+        async with get_async_session() as session:
             events = (await session.execute(
-                select(Event)
-                .where(Event.id.in_(event_ids))
+                gen_feed_statement(
+                    format=format,
+                    tag=tag,
+                    starting_from=(
+                        datetime.fromtimestamp(starting_from, tz=timezone.utc)
+                        if starting_from is not None else datetime.now(tz=timezone.utc)
+                    ),
+                    starting_to=(
+                        datetime.fromtimestamp(starting_to, tz=timezone.utc)
+                        if starting_to is not None else None
+                    ),
+                    is_announced=is_announced,
+                    is_gathering=is_gathering,
+                    is_dropped=is_dropped,
+                    cursor=cursor
+                )
+                .limit(limit + 1)
             )).scalars().all()
 
-            for event in events:
-                appreciated.append(await gen_response_event(event, session))
-
-            tickets = (await session.execute(
-                select(Ticket)
-                .where(Ticket.user_id == request.state.user_id)
-            ))
-            event_ticket_ids = list(map(lambda x: x.event_ticket_id, tickets))
+            next_cursor = None
+            if len(events) > limit:
+                events = events[:limit]
+                next_cursor = encode_cursor(events[-1].starting_time.isoformat(), events[-1].id)
 
-            events = (await session.execute(
-                select(Event)
-                .where(Event.id.in_(event_ticket_ids))
-            ))
+            etag = weak_etag(
+                compact,
+                next_cursor,
+                [event.id for event in events],
+                await fetch_events_version(events, session)
+            )
+            if is_not_modified(request, etag):
+                return fastapi.Response(status_code=304, headers={"ETag": etag})
 
-            for event in events:
-                acquired.append(await gen_response_event(event, session))
+            response_data = await gen_response_events(events, session, compact=compact)
 
     except Exception as err:
         logger.exception(err)
@@ -364,56 +745,160 @@ async def get_user_events(
             description=str(err)
         )
 
-    return GetUserEventsResponse(
-        data=GetUserEventsData(
-            owned=owned,
-            appreciated=appreciated,
-            acquired=acquired
-        )
+    response.headers["ETag"] = etag
+
+    response_model = GetCompactEventsResponse if compact else GetManyEventsResponse
+    return model_response(
+        response_model(
+            data=response_data,
+            cursor=next_cursor
+        ),
+        headers={"ETag": etag}
     )
 
 
-@event_router.get(
-    path="/search",
-    response_model=GetManyEventsResponse,
-    description="Search events",
-)
-async def search_events(
-    query: str
-) -> GetManyEventsResponse:
+SEARCH_STREAM_CHUNK_SIZE = 10
+
 
+def gen_search_statement(query: str, cursor: str | None = None):
     tags = re.findall(r"#(\w+)", query)
     tags = [
         tag[1:] if tag.startswith("#") else tag
         for tag in tags
     ]
 
-    query = re.sub(r"#\w+", "", query).strip()
+    query = re.sub(r"#\w+", "", query).strip().lower()
 
-    response_data = []
+    conditions = []
+
+    if query:
+        score = func.greatest(
+            func.similarity(func.lower(Event.title), query),
+            func.similarity(func.lower(Event.description), query),
+        )
+        conditions.append(
+            or_(
+                func.lower(Event.title).op('%')(query),
+                func.lower(Event.description).op('%')(query),
+            )
+        )
+
+    else:
+        score = literal(0.0)
+
+    if tags:
+        conditions.append(
+            select(EventTag.id)
+            .join(Tag, Tag.id == EventTag.tag_id)
+            .where(
+                and_(
+                    EventTag.event_id == Event.id,
+                    or_(*[
+                        Tag.name.op('%')(tag.lower())
+                        for tag in tags
+                    ])
+                )
+            )
+            .exists()
+        )
+
+    if cursor:
+        cursor_score, cursor_id = decode_cursor(cursor, 2)
+        conditions.append(
+            or_(
+                score < cursor_score,
+                and_(score == cursor_score, Event.id < cursor_id)
+            )
+        )
+
+    score = score.label("score")
+
+    return (
+        select(Event, score)
+        .where(*conditions)
+        .order_by(score.desc(), Event.id.desc())
+    )
+
+
+async def fetch_search_page(
+    query: str,
+    cursor: str | None,
+    limit: int,
+    session: AsyncSession
+) -> tuple[list[Event], str | None]:
+    rows = (await session.execute(
+        gen_search_statement(query, cursor)
+        .limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].Event.id)
+
+    return [row.Event for row in rows], next_cursor
+
+
+async def stream_search_events(
+    query: str,
+    cursor: str | None,
+    limit: int,
+    compact: bool = False
+) -> AsyncIterator[str]:
+    response_model = GetCompactEventsResponse if compact else GetManyEventsResponse
 
     try:
         async with get_async_session() as session:
-            events = (await session.execute(
-                select(Event)
-                .outerjoin(EventTag, Event.id == EventTag.event_id)
-                .outerjoin(Tag, Tag.id == EventTag.tag_id)
-                .where(
-                    and_(
-                        or_(
-                            func.lower(Event.title).op('%')(query),
-                            func.lower(Event.description).op('%')(query),
-                        ),
-                        or_(
-                            func.lower(Tag.name).op('%')(tag)
-                            for tag in tags
-                        )
-                    )
+            events, next_cursor = await fetch_search_page(query, cursor, limit, session)
+
+            for i in range(0, len(events), SEARCH_STREAM_CHUNK_SIZE):
+                response_data = await gen_response_events(
+                    events[i:i + SEARCH_STREAM_CHUNK_SIZE], session, compact=compact
                 )
-            )).scalars().unique().all()
+                yield response_model(data=response_data).model_dump_json() + "\n"
+
+    except Exception as err:
+        logger.exception(err)
+        yield GetManyEventsResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        ).model_dump_json() + "\n"
+        return
+
+    yield GetManyEventsResponse(cursor=next_cursor).model_dump_json() + "\n"
 
-            for event in events:
-                response_data.append(await gen_response_event(event, session))
+
+@event_router.get(
+    path="/search",
+    response_model=GetManyEventsResponse | GetCompactEventsResponse,
+    description="Search events ordered by relevance. "
+                "Pass the returned cursor to get the next page, "
+                "stream=true returns NDJSON chunks with the cursor in the last line, "
+                "compact=true leaves out descriptions and albums",
+)
+async def search_events(
+    query: str,
+    request: fastapi.Request,
+    cursor: str | None = None,
+    limit: int = fastapi.Query(default=20, ge=1, le=100),
+    stream: bool = False,
+    compact: bool = False
+) -> GetManyEventsResponse | GetCompactEventsResponse | StreamingResponse:
+
+    # api_key callers without a user_id cookie have no history
+    if request.state.user_id and not cursor and query.strip():
+        search_history.record(request.state.user_id, query.strip())
+
+    if stream:
+        return StreamingResponse(
+            stream_search_events(query, cursor, limit, compact),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        async with get_async_session() as session:
+            events, next_cursor = await fetch_search_page(query, cursor, limit, session)
+            response_data = await gen_response_events(events, session, compact=compact)
 
     except Exception as err:
         logger.exception(err)
@@ -422,8 +907,12 @@ async def search_events(
             description=str(err)
         )
 
-    return GetManyEventsResponse(
-        data=response_data
+    response_model = GetCompactEventsResponse if compact else GetManyEventsResponse
+    return model_response(
+        response_model(
+            data=response_data,
+            cursor=next_cursor
+        )
     )
 
 
@@ -433,7 +922,8 @@ async def search_events(
     description="Get search history",
 )
 async def get_search_events(
-    request: fastapi.Request
+    request: fastapi.Request,
+    limit: int = fastapi.Query(default=20, ge=1, le=100)
 ) -> GetSearchHistoryResponse:
 
     try:
@@ -441,6 +931,8 @@ async def get_search_events(
             queries = (await session.execute(
                 select(SearchQuery)
                 .where(SearchQuery.user_id == request.state.user_id)
+                .order_by(SearchQuery.id.desc())
+                .limit(limit)
             )).scalars().all()
 
     except Exception as err:
@@ -476,6 +968,7 @@ async def drop_search_events(
                 delete(SearchQuery)
                 .where(SearchQuery.user_id == request.state.user_id)
             )
+            await session.commit()
 
     except Exception as err:
         logger.exception(err)
@@ -498,24 +991,9 @@ async def get_my_event_stats(
 
     try:
         async with get_async_session() as session:
-            owners = (await session.execute(
-                select(Member)
-                .where(
-                    and_(
-                        Member.user_id == request.state.user_id,
-                        Member.role == MemberRole.owner
-                    )
-                )
-            )).scalars().all()
-            event_ids = map(lambda x: x.event_id, owners)
-
-            events = (await session.execute(
-                select(func.count()).select_from(Event).where(Event.id.in_(event_ids))
-            )).scalar()
-
-            members = (await session.execute(
-                select(func.count()).select_from(Member).where(Member.event_id.in_(event_ids))
-            )).scalar()
+            stats = (await session.execute(
+                gen_total_stats_query(gen_owned_events_query(request.state.user_id))
+            )).one()
 
     except Exception as err:
         logger.exception(err)
@@ -526,8 +1004,11 @@ async def get_my_event_stats(
 
     return GetMyStatsResponse(
         data=GetMyStatsData(
-            total_events=events,
-            total_members=members
+            total_events=stats.events,
+            total_members=stats.members,
+            total_likes=stats.likes,
+            total_tickets_sold=stats.tickets_sold,
+            total_revenue=stats.revenue
         )
     )
 
@@ -543,9 +1024,9 @@ async def get_event_stats(
 
     try:
         async with get_async_session() as session:
-            members = (await session.execute(
-                select(func.count()).select_from(Member).where(Member.event_id.in_(event_id))
-            )).scalar()
+            stats = (await session.execute(
+                gen_total_stats_query([event_id])
+            )).one()
 
     except Exception as err:
         logger.exception(err)
@@ -556,6 +1037,9 @@ async def get_event_stats(
 
     return GetEventStatsResponse(
         data=GetEventStatsData(
-            total_members=members
+            total_members=stats.members,
+            total_likes=stats.likes,
+            total_tickets_sold=stats.tickets_sold,
+            total_revenue=stats.revenue
         )
     )
@@ -2,10 +2,10 @@
 import fastapi
 from loguru import logger
 
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
 
 from app.enum import ResponseStatus
-from app.model import EventTicket
+from app.model import EventTicket, Event
 
 from app.schema.request import CreateEventTicketRequest, UpdateEventTicketRequest
 from app.schema.response import (
@@ -16,10 +16,12 @@ from app.schema.response import (
     GetEventTicketData
 )
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.cache import invalidate_events
 
 
-event_ticket_router = fastapi.APIRouter(prefix="/event_ticket", tags=["event_ticket"])
+event_ticket_router = fastapi.APIRouter(prefix="/event_ticket", tags=["event_ticket"], route_class=MeteredRoute)
 
 
 @event_ticket_router.post(
@@ -44,6 +46,8 @@ async def create_event_ticket(
             session.add(ticket)
             await session.commit()
 
+        await invalidate_events(data.event_id)
+
     except Exception as err:
         logger.exception(err)
         return CreateEventTicketResponse(
@@ -96,8 +100,19 @@ async def delete_event_ticket(
         async with get_async_session() as session:
             event = await session.get(EventTicket, id)
             await session.delete(event)
+
+            # the cascaded tickets leave no update_time behind, mark the event for the stats refresh
+            await session.execute(
+                update(Event)
+                .where(Event.id == event.event_id)
+                .values(update_time=func.now())
+                .execution_options(synchronize_session=False)
+            )
+
             await session.commit()
 
+        await invalidate_events(event.event_id)
+
     except Exception as err:
         logger.exception(err)
         return DeleteEventTicketResponse(
@@ -121,18 +136,21 @@ async def update_event_ticket(
         async with get_async_session() as session:
             data_dict = data.model_dump()
 
-            await session.execute(
+            event_id = (await session.execute(
                 update(EventTicket)
                 .where(EventTicket.id == data.id)
                 .values(**{
                     key: data_dict[key]
                     for key in data_dict if key not in ["id"] and data_dict.get(key)
                 })
+                .returning(EventTicket.event_id)
                 .execution_options(synchronize_session="fetch")
-            )
+            )).scalar()
 
             await session.commit()
 
+        await invalidate_events(event_id)
+
     except Exception as err:
         logger.exception(err)
         return UpdateEventTicketResponse(
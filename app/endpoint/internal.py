@@ -0,0 +1,81 @@
+
+import hmac
+import fastapi
+from fastapi.responses import PlainTextResponse
+from loguru import logger
+
+from app.enum import ResponseStatus
+
+from app.schema.response import GetMetricsResponse
+from app.schema.response import GetMetricsData, GetPoolMetricsData, GetCacheMetricsData
+
+from app.metrics import MeteredRoute, render
+from app.database import get_pool_metrics
+from app.cache import event_cache
+
+from config import get_settings
+
+
+internal_router = fastapi.APIRouter(prefix="/internal", tags=["internal"], route_class=MeteredRoute)
+
+
+@internal_router.get(
+    path="/metrics",
+    response_model=GetMetricsResponse,
+    description="Get connection pool and cache metrics",
+)
+async def get_metrics() -> GetMetricsResponse:
+
+    try:
+        pools = [
+            GetPoolMetricsData(name=name, **metrics)
+            for name, metrics in get_pool_metrics().items()
+        ]
+        caches = [
+            GetCacheMetricsData(name="event", hits=event_cache.hits, misses=event_cache.misses)
+        ]
+
+    except Exception as err:
+        logger.exception(err)
+        return GetMetricsResponse(
+            status=ResponseStatus.unexpected_error,
+            description=str(err)
+        )
+
+    return GetMetricsResponse(
+        data=GetMetricsData(
+            pools=pools,
+            caches=caches
+        )
+    )
+
+
+@internal_router.get(
+    path="/prometheus",
+    response_class=PlainTextResponse,
+    description="Get metrics in Prometheus text exposition format, "
+                "authorized by a Bearer APP__METRICS_TOKEN (APP__KEY when unset) instead of a user",
+)
+async def get_prometheus_metrics(
+    authorization: str | None = fastapi.Header(default=None)
+) -> PlainTextResponse:
+
+    settings = get_settings().app
+    token = settings.metrics_token or settings.key
+
+    # an empty token would let an empty Bearer credential through
+    if not token:
+        return PlainTextResponse(content="Metrics token is not configured\n", status_code=403)
+
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), token.encode()):
+        return PlainTextResponse(
+            content="Bearer metrics token required\n",
+            status_code=401,
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    return PlainTextResponse(
+        content=render(pools=get_pool_metrics()),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -2,7 +2,8 @@
 import fastapi
 from loguru import logger
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import update, delete, and_
+from sqlalchemy.dialects.postgresql import insert
 
 from app.enum import ResponseStatus
 from app.model import Like, Event
@@ -10,10 +11,12 @@ from app.model import Like, Event
 from app.schema.request import LikeRequest
 from app.schema.response import LikeResponse, LikeData
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.cache import invalidate_events
 
 
-like_router = fastapi.APIRouter(prefix="/like", tags=["like"])
+like_router = fastapi.APIRouter(prefix="/like", tags=["like"], route_class=MeteredRoute)
 
 
 @like_router.post(
@@ -28,33 +31,45 @@ async def add_like(
 
     try:
         async with get_async_session() as session:
-            like = (await session.execute(
-                select(Like)
+            unliked = (await session.execute(
+                delete(Like)
                 .where(
                     and_(
                         Like.event_id == data.event_id,
                         Like.user_id == request.state.user_id,
                     )
                 )
-            )).scalars().first()
+                .returning(Like.id)
+            )).first()
 
-            if like:
-                await session.delete(like)
+            if unliked:
+                delta = -1
 
             else:
-                like = Like(
-                    event_id=data.event_id,
-                    user_id=request.state.user_id,
-                )
+                liked = (await session.execute(
+                    insert(Like)
+                    .values(
+                        event_id=data.event_id,
+                        user_id=request.state.user_id,
+                    )
+                    .on_conflict_do_nothing(index_elements=[Like.event_id, Like.user_id])
+                    .returning(Like.id)
+                )).first()
 
-                session.add(like)
+                delta = 1 if liked else 0
 
             likes = (await session.execute(
-                select(func.count()).select_from(Like).where(Event.id == data.event_id)
+                update(Event)
+                .where(Event.id == data.event_id)
+                .values(like_count=Event.like_count + delta)
+                .returning(Event.like_count)
+                .execution_options(synchronize_session=False)
             )).scalar()
 
             await session.commit()
 
+        await invalidate_events(data.event_id)
+
     except Exception as err:
         logger.exception(err)
 
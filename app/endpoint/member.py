@@ -1,5 +1,4 @@
 
-import aiohttp
 import fastapi
 from loguru import logger
 
@@ -12,12 +11,12 @@ from app.schema.request import CreateMemberRequest, UpdateMemberRequest
 from app.schema.response import CreateMemberResponse, UpdateMemberResponse, GetMemberResponse, GetManyMemberResponse, GetMemberData
 from app.schema.response import CreateMemberData
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.users import get_user_loader
 
-from config import get_settings
 
-
-member_router = fastapi.APIRouter(prefix="/member", tags=["member"])
+member_router = fastapi.APIRouter(prefix="/member", tags=["member"], route_class=MeteredRoute)
 
 
 @member_router.post(
@@ -92,24 +91,6 @@ async def update_member(
     )
 
 
-async def gen_users_dict(user_ids: list[str], cookies: dict) -> GetMemberData:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url=f"{get_settings().services.user}/users/many",
-            params={"ids": user_ids},
-            cookies=cookies,
-            raise_for_status=False
-        ) as response:
-            logger.debug(f"{response} -> {await response.text()}")
-
-            data = await response.json()
-
-    return {
-        row["id"]: row
-        for row in data
-    }
-
-
 @member_router.get(
     path="/",
     response_model=GetMemberResponse,
@@ -129,7 +110,7 @@ async def create_member(
                 )
             )).scalars().first()
 
-        users_dict = await gen_users_dict(user_ids=[member.user_id], cookies=request.cookies)
+        users_dict = await get_user_loader(request).load_many([member.user_id])
         user = users_dict[member.user_id]
 
     except Exception as err:
@@ -168,10 +149,9 @@ async def create_many_member(
                 .where(Member.event_id == event_id)
             )).scalars().all()
 
-            users_dict = await gen_users_dict(
-                user_ids=list(map(lambda x: x.user_id, members)),
-                cookies=request.cookies
-            )
+        users_dict = await get_user_loader(request).load_many(
+            list(map(lambda x: x.user_id, members))
+        )
 
     except Exception as err:
         logger.exception(err)
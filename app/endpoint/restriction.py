@@ -20,10 +20,11 @@ from app.schema.response import (
     GetRestrictionData
 )
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
 
 
-restriction_router = fastapi.APIRouter(prefix="/restriction", tags=['restriction'])
+restriction_router = fastapi.APIRouter(prefix="/restriction", tags=['restriction'], route_class=MeteredRoute)
 
 
 @restriction_router.post(
@@ -12,10 +12,12 @@ from app.schema.request import AnnounceEventRequest, StopGatheringEventRequest
 from app.schema.response import AnnouncedEventResponse, StopGatheringEventResponse, GetSettingsResponse
 from app.schema.response import AnnouncedEventData, StopGatheringEventData, GetSettingsData
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.cache import invalidate_events
 
 
-settings_router = fastapi.APIRouter(prefix="/settings", tags=["settings"])
+settings_router = fastapi.APIRouter(prefix="/settings", tags=["settings"], route_class=MeteredRoute)
 
 
 @settings_router.get(
@@ -88,6 +90,8 @@ async def announce_event(
 
                 await session.commit()
 
+        await invalidate_events(data.event_id)
+
     except Exception as err:
         logger.exception(err)
         return AnnouncedEventResponse(
@@ -131,6 +135,8 @@ async def gather_event(
             )
             await session.commit()
 
+        await invalidate_events(data.event_id)
+
     except Exception as err:
         logger.exception(err)
         return AnnouncedEventResponse(
@@ -4,7 +4,8 @@ import re
 
 from loguru import logger
 
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, and_, event
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.enum import ResponseStatus
@@ -14,56 +15,88 @@ from app.schema.request import UpdateTagRequest
 from app.schema.response import UpdateTagResponse, SearchTagResponse
 from app.schema.response import UpdateTagData, SearchTagData
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.autocomplete import tag_index
+from app.cache import invalidate_events
 
 
-tag_router = fastapi.APIRouter(prefix="/tag", tags=["tag"])
+tag_router = fastapi.APIRouter(prefix="/tag", tags=["tag"], route_class=MeteredRoute)
 
 
-async def update_tags(tags: list[str], event_id: int, session: AsyncSession) -> list[EventTag]:
-    tag_names = [
+async def update_tags(tags: list[str], event_id: int, session: AsyncSession) -> list[int]:
+    tag_names = list(dict.fromkeys(
         tag.lower()[1:] if tag.startswith("#") else tag.lower()
         for tag in tags
-    ]
-
-    tags = (await session.execute(
-        select(Tag)
-        .where(Tag.name.in_(tag_names))
-    )).scalars().all()
-
-    tags_dict = {
-        tag.name: tag
-        for tag in tags
-    }
-
-    for tag_name in tag_names:
-        if tag_name in tags_dict:
-            continue
-
-        tag = Tag(name=tag_name)
-        tags_dict.update({tag_name: tag})
-
-        session.add(tag)
-        await session.flush()
-
-    await session.execute(
-        delete(EventTag)
+    ))
+
+    tag_ids = {}
+
+    if tag_names:
+        tag_ids.update((await session.execute(
+            select(func.lower(Tag.name), Tag.id)
+            .where(func.lower(Tag.name).in_(tag_names))
+        )).all())
+
+        missing = [name for name in tag_names if name not in tag_ids]
+        if missing:
+            tag_ids.update((await session.execute(
+                insert(Tag)
+                .values([{"name": name} for name in missing])
+                .on_conflict_do_nothing(index_elements=[func.lower(Tag.name)])
+                .returning(Tag.name, Tag.id)
+            )).all())
+
+        # created by a concurrent transaction between the select and the insert
+        missing = [name for name in tag_names if name not in tag_ids]
+        if missing:
+            tag_ids.update((await session.execute(
+                select(func.lower(Tag.name), Tag.id)
+                .where(func.lower(Tag.name).in_(missing))
+            )).all())
+
+    event_tag_ids = dict((await session.execute(
+        select(EventTag.tag_id, EventTag.id)
         .where(EventTag.event_id == event_id)
-    )
-
-    event_tags = []
-
-    for tag_name in tag_names:
-        event_tag = EventTag(
-            tag_id=tags_dict[tag_name].id,
-            event_id=event_id
+    )).all())
+
+    wanted = [tag_ids[name] for name in tag_names]
+
+    removed = set(event_tag_ids) - set(wanted)
+    if removed:
+        await session.execute(
+            delete(EventTag)
+            .where(
+                and_(
+                    EventTag.event_id == event_id,
+                    EventTag.tag_id.in_(removed)
+                )
+            )
         )
-        event_tags.append(event_tag)
 
-        session.add(event_tag)
-        await session.flush()
+    added = [tag_id for tag_id in wanted if tag_id not in event_tag_ids]
+    if added:
+        event_tag_ids.update((await session.execute(
+            insert(EventTag)
+            .values([
+                {"event_id": event_id, "tag_id": tag_id}
+                for tag_id in added
+            ])
+            .on_conflict_do_nothing(index_elements=[EventTag.event_id, EventTag.tag_id])
+            .returning(EventTag.tag_id, EventTag.id)
+        )).all())
+
+    event.listen(
+        session.sync_session, "after_commit",
+        lambda _: tag_index.update(tags=tag_ids, added=added, removed=list(removed)),
+        once=True
+    )
 
-    return event_tags
+    return [
+        event_tag_ids[tag_id]
+        for tag_id in wanted
+        if tag_id in event_tag_ids
+    ]
 
 
 @tag_router.put(
@@ -78,13 +111,15 @@ async def create_event(
     try:
 
         async with get_async_session() as session:
-            event_tags = await update_tags(
+            event_tag_ids = await update_tags(
                 tags=data.tags,
                 event_id=data.event_id,
                 session=session
             )
             await session.commit()
 
+        await invalidate_events(data.event_id)
+
     except Exception as err:
         logger.exception(err)
         return UpdateTagResponse(
@@ -94,8 +129,8 @@ async def create_event(
 
     return UpdateTagResponse(
         data=[
-            UpdateTagData(id=tag.id)
-            for tag in event_tags
+            UpdateTagData(id=event_tag_id)
+            for event_tag_id in event_tag_ids
         ]
     )
 
@@ -106,7 +141,8 @@ async def create_event(
     description="Search tags",
 )
 async def search_tags(
-    query: str
+    query: str,
+    limit: int = fastapi.Query(default=10, ge=1, le=50)
 ) -> SearchTagResponse:
 
     response_data = []
@@ -117,14 +153,24 @@ async def search_tags(
             data=response_data
         )
 
-    last_query_tag = query_tags[-1][1:]
+    last_query_tag = query_tags[-1][1:].lower()
+
+    if tag_index.loaded:
+        return SearchTagResponse(
+            data=[
+                SearchTagData(id=tag_id, name=name)
+                for tag_id, name in tag_index.search(last_query_tag, limit)
+            ]
+        )
 
     try:
         async with get_async_session() as session:
             tags = (await session.execute(
                 select(Tag)
                 .where(Tag.name.op('%')(last_query_tag))
-            )).scalars().unique().all()
+                .order_by(func.similarity(Tag.name, last_query_tag).desc())
+                .limit(limit)
+            )).scalars().all()
 
             for tag in tags:
                 response_data.append(SearchTagData(**tag.__dict__))
@@ -139,4 +185,3 @@ async def search_tags(
     return SearchTagResponse(
         data=response_data
     )
-
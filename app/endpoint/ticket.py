@@ -2,10 +2,10 @@
 import fastapi
 from loguru import logger
 
-from sqlalchemy import select, update
+from sqlalchemy import select, update, insert, delete, and_
 
 from app.enum import ResponseStatus
-from app.model import Ticket
+from app.model import Ticket, EventTicket
 
 from app.schema.request import CreateTicketRequest
 from app.schema.response import (
@@ -16,10 +16,12 @@ from app.schema.response import (
     CreateTicketData, GetTicketData
 )
 
+from app.metrics import MeteredRoute
 from app.database import get_async_session
+from app.cache import invalidate_events
 
 
-ticket_router = fastapi.APIRouter(prefix="/ticket", tags=["ticket"])
+ticket_router = fastapi.APIRouter(prefix="/ticket", tags=["ticket"], route_class=MeteredRoute)
 
 
 @ticket_router.post(
@@ -33,13 +35,41 @@ async def create_ticket(
 
     try:
         async with get_async_session() as session:
-            ticket = Ticket(
-                event_ticket_id=data.event_ticket_id,
-                user_id=data.user_id
-            )
-            session.add(ticket)
+            event_ticket = (await session.execute(
+                update(EventTicket)
+                .where(
+                    and_(
+                        EventTicket.id == data.event_ticket_id,
+                        EventTicket.stock >= data.amount
+                    )
+                )
+                .values(stock=EventTicket.stock - data.amount)
+                .returning(EventTicket.stock, EventTicket.event_id)
+                .execution_options(synchronize_session=False)
+            )).first()
+
+            if event_ticket is None:
+                return CreateTicketResponse(
+                    status=ResponseStatus.sold_out,
+                    description=f"Not enough tickets in stock for {data.event_ticket_id}"
+                )
+
+            ticket_ids = (await session.execute(
+                insert(Ticket)
+                .values([
+                    dict(
+                        event_ticket_id=data.event_ticket_id,
+                        user_id=data.user_id
+                    )
+                    for _ in range(data.amount)
+                ])
+                .returning(Ticket.id)
+            )).scalars().all()
+
             await session.commit()
 
+        await invalidate_events(event_ticket.event_id)
+
     except Exception as err:
         logger.exception(err)
         return CreateTicketResponse(
@@ -49,7 +79,9 @@ async def create_ticket(
 
     return CreateTicketResponse(
         data=CreateTicketData(
-            id=ticket.id
+            id=ticket_ids[0],
+            ids=ticket_ids,
+            stock=event_ticket.stock
         )
     )
 
@@ -65,10 +97,27 @@ async def delete_ticket(
 
     try:
         async with get_async_session() as session:
-            ticket = await session.get(Ticket, id)
-            await session.delete(ticket)
+            event_ticket_id = (await session.execute(
+                delete(Ticket)
+                .where(Ticket.id == id)
+                .returning(Ticket.event_ticket_id)
+            )).scalar()
+
+            if event_ticket_id is None:
+                return DeleteTicketResponse()
+
+            event_id = (await session.execute(
+                update(EventTicket)
+                .where(EventTicket.id == event_ticket_id)
+                .values(stock=EventTicket.stock + 1)
+                .returning(EventTicket.event_id)
+                .execution_options(synchronize_session=False)
+            )).scalar()
+
             await session.commit()
 
+        await invalidate_events(event_id)
+
     except Exception as err:
         logger.exception(err)
         return DeleteTicketResponse(
@@ -2,5 +2,6 @@
 from .event_format import EventFormat
 from .restriction_action import RestrictionAction
 from .member_role import MemberRole
+from .image_size import ImageSize
 
 from .response_status import ResponseStatus
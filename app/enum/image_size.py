@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ImageSize(Enum):
+    thumb = "thumb"
+    medium = "medium"
+    full = "full"
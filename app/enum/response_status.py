@@ -5,3 +5,5 @@ import enum
 class ResponseStatus(enum.Enum):
     ok = "ok"
     unexpected_error = "unexpected_error"
+    sold_out = "sold_out"
+    invalid_file = "invalid_file"
@@ -0,0 +1,26 @@
+import hashlib
+
+import fastapi
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def weak_etag(*parts) -> str:
+    return f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+
+def is_not_modified(request: fastapi.Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    tags = {
+        tag.strip().removeprefix("W/")
+        for tag in if_none_match.split(",")
+    }
+    return etag.removeprefix("W/") in tags
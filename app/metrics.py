@@ -0,0 +1,217 @@
+import collections
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.enum import ResponseStatus
+from app.profiler import query_profiler
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+        self.values: dict[tuple, float] = {}
+
+        REGISTRY.append(self)
+
+    def inc(self, *labels, value: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {value}")
+
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = {}
+
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, counts in self.counts.items():
+            total = 0
+            for bucket, count in zip((*self.buckets, "+Inf"), counts):
+                total += count
+                bucket_labels = format_labels(self.labels, labels, f'le="{bucket}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {total}")
+
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {total}")
+
+        return lines
+
+
+REQUESTS = Counter(
+    "http_requests_total", "Handled requests",
+    ("router", "route", "method", "status")
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total", "Requests answered with a non-ok ResponseStatus or an exception",
+    ("router", "route", "status")
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Endpoint handling time",
+    ("router", "route")
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements issued per request",
+    ("router", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100)
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Database time per request",
+    ("router", "route")
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database statement execution time",
+    ("engine",)
+)
+USER_SERVICE_DURATION = Histogram(
+    "user_service_request_duration_seconds", "User service call time",
+    ("endpoint", "status")
+)
+UPDATER_TASK_DURATION = Histogram(
+    "updater_task_duration_seconds", "Updater task run time",
+    ("task",)
+)
+UPDATER_TASK_ERRORS = Counter(
+    "updater_task_errors_total", "Failed updater task runs",
+    ("task",)
+)
+
+
+class RequestStats:
+    def __init__(self, route: str, profiled: bool = False):
+        self.route = route
+        self.queries = 0
+        self.db_seconds = 0.0
+
+        # statement fingerprints are only collected for sampled requests
+        self.fingerprints: collections.Counter | None = collections.Counter() if profiled else None
+
+
+REQUEST_STATS: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # kept on the execution context, a statement that raises leaves nothing behind on the connection
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.query_started
+        DB_QUERY_DURATION.observe(duration, name)
+
+        stats = REQUEST_STATS.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += duration
+
+        query_profiler.on_statement(stats, name, statement, parameters, duration)
+
+
+class MeteredRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        tags = kwargs.get("tags") or ["default"]
+        methods = ",".join(sorted(kwargs.get("methods") or ["GET"]))
+
+        APIRoute.__init__(self, path, self.wrap_endpoint(endpoint, str(tags[0]), path, methods), **kwargs)
+
+    @staticmethod
+    def wrap_endpoint(endpoint, router: str, route: str, method: str):
+        # include_router recreates routes from the already wrapped endpoint
+        if getattr(endpoint, "metered", False):
+            return endpoint
+
+        @functools.wraps(endpoint)
+        async def metered_endpoint(*args, **kwargs):
+            stats = RequestStats(f"{method} {route}", profiled=query_profiler.sample())
+            token = REQUEST_STATS.set(stats)
+            started = time.perf_counter()
+            status = "exception"
+
+            try:
+                result = await endpoint(*args, **kwargs)
+
+                status = getattr(result, "status", None) or ResponseStatus.ok
+                status = status.value if isinstance(status, ResponseStatus) else str(status)
+                return result
+
+            finally:
+                REQUEST_STATS.reset(token)
+
+                REQUESTS.inc(router, route, method, status)
+                if status != ResponseStatus.ok.value:
+                    REQUEST_ERRORS.inc(router, route, status)
+
+                REQUEST_DURATION.observe(time.perf_counter() - started, router, route)
+                REQUEST_DB_QUERIES.observe(stats.queries, router, route)
+                REQUEST_DB_DURATION.observe(stats.db_seconds, router, route)
+
+                query_profiler.on_request_end(stats)
+
+        metered_endpoint.metered = True
+        return metered_endpoint
+
+
+def render(pools: dict[str, dict] | None = None) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+
+    for key in ("size", "checked_in", "checked_out", "overflow", "checkouts", "wait_seconds"):
+        name = f"db_pool_{key}"
+        lines.append(f"# TYPE {name} gauge")
+        for pool, metrics in (pools or {}).items():
+            lines.append(f'{name}{{pool="{pool}"}} {metrics[key]}')
+
+    return "\n".join(lines) + "\n"
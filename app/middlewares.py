@@ -1,68 +1,260 @@
-from http.client import responses
+import asyncio
+import gzip
+import hashlib
+import re
+import time
+import zlib
 
-import aiohttp
+import brotli
 from loguru import logger
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from app.cache import TTLCache, MISSING
+from app.client import get_client_session
+from app.metrics import USER_SERVICE_DURATION
 
 from config import get_settings
 
 
-class CheckAuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        BaseHTTPMiddleware.__init__(self, app)
+class CheckAuthMiddleware:
+    # /internal/prometheus is scraped without a user, the endpoint checks the metrics token itself
+    PUBLIC_PATHS = re.compile(r"^/(?:docs|openapi\.json|internal/prometheus)$")
+    PUBLIC_GET_PATHS = re.compile(r"^/album/[^/]+$")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
         self.log = logger.bind(classname=self.__class__.__name__)
-        self.user_service_endpoint = get_settings().services.user
+
+        settings = get_settings().services
+        self.user_service_endpoint = settings.user
         if self.user_service_endpoint.endswith("/"):
             self.user_service_endpoint = self.user_service_endpoint[:-1]
 
-    async def get_user_id(self, cookies: dict) -> str | None:
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url=f"{self.user_service_endpoint}/me",
-                    cookies=cookies,
-                    raise_for_status=True
-                ) as response:
-                    self.log.debug(f"{response} -> {await response.text()}")
+        self.users = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+        self.negative_ttl = settings.auth_negative_ttl_seconds
+        self.pending: dict[str, asyncio.Task] = {}
+
+    async def fetch_user_id(self, cookies: dict) -> str | None:
+        started = time.perf_counter()
+
+        async with get_client_session().get(
+            url=f"{self.user_service_endpoint}/me",
+            cookies=cookies
+        ) as response:
+            self.log.debug(f"{response.method} {response.url.path} -> {response.status}")
+            USER_SERVICE_DURATION.observe(time.perf_counter() - started, "/me", response.status)
+
+            if 400 <= response.status < 500:
+                return None
 
-                    data = await response.json()
-                    return data["id"]
+            response.raise_for_status()
+
+            data = await response.json()
+            return data["id"]
+
+    def cache_user_id(self, key: str, task: asyncio.Task):
+        self.pending.pop(key, None)
+
+        if task.cancelled() or task.exception():
+            return
+
+        user_id = task.result()
+        self.users.set(key, user_id, ttl=None if user_id else self.negative_ttl)
+
+    async def get_user_id(self, cookies: dict, access_token: str | None) -> str | None:
+        if not access_token:
+            return None
+
+        key = hashlib.sha256(access_token.encode()).hexdigest()
+
+        user_id = self.users.get(key, MISSING)
+        if user_id is not MISSING:
+            return user_id
+
+        # concurrent requests with the same token share one lookup
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self.fetch_user_id(cookies))
+            task.add_done_callback(lambda done: self.cache_user_id(key, done))
+            self.pending[key] = task
+
+        try:
+            return await asyncio.shield(task)
 
         except Exception as err:
+            self.log.warning(f"Failed to get user -> {err!r}")
             return None
 
-    async def dispatch(self, request: Request, call_next):
-        url_parts = str(request.url).split("/")
+    def is_public(self, scope: Scope) -> bool:
+        # the allowlist is anchored to the route path, behind APP__PATH the request path carries the prefix
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        if self.PUBLIC_PATHS.match(path):
+            return True
 
-        dest = url_parts[-1]
-        if dest in ["docs", "openapi.json"]:
-            response = await call_next(request)
-            return response
+        return scope["method"] in ("GET", "HEAD") and self.PUBLIC_GET_PATHS.match(path) is not None
 
-        dest_path = str(request.url).split("/")[-2]
-        if dest_path in ["album"]:
-            response = await call_next(request)
-            return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.is_public(scope):
+            await self.app(scope, receive, send)
+            return
 
-        key = request.cookies.get("api_key")
+        connection = HTTPConnection(scope)
+        cookies = connection.cookies
+
+        key = cookies.get("api_key")
         if key == get_settings().app.key:
-            user_id = request.cookies.get("user_id")
+            user_id = cookies.get("user_id")
 
         else:
-            gather_access_token = request.headers.get("gather_access_token", request.cookies.get("gather_access_token"))
-            user_id = await self.get_user_id({**request.cookies, "gather_access_token": gather_access_token})
+            gather_access_token = connection.headers.get("gather_access_token", cookies.get("gather_access_token"))
+            user_id = await self.get_user_id(
+                cookies={**cookies, "gather_access_token": gather_access_token},
+                access_token=gather_access_token
+            )
 
             if not user_id:
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=401,
                     content={"detail": f"You are not allowed to access this endpoint"}
                 )
+                await response(scope, receive, send)
+                return
+
+        scope.setdefault("state", {})["user_id"] = user_id
+
+        await self.app(scope, receive, send)
+
+
+class CompressionMiddleware:
+    COMPRESSIBLE_TYPES = re.compile(r"^(?:application/(?:json|x-ndjson)|text/)")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+        settings = get_settings().compression
+        self.minimum_size = settings.minimum_size
+        self.threaded_size = settings.threaded_size
+        self.gzip_level = settings.gzip_level
+        self.brotli_quality = settings.brotli_quality
+
+    def choose_encoding(self, accept_encoding: str) -> str | None:
+        accepted = {}
+        for item in accept_encoding.lower().split(","):
+            name, _, params = item.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+
+            accepted[name.strip()] = quality
+
+        for encoding in ("br", "gzip"):
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+
+        return None
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def gen_compressor(self, encoding: str):
+        if encoding == "br":
+            return brotli.Compressor(quality=self.brotli_quality)
+
+        return zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def flush_compressor(self, encoding: str, compressor, chunk: bytes, more_body: bool) -> bytes:
+        if encoding == "br":
+            data = compressor.process(chunk)
+            return data + (compressor.flush() if more_body else compressor.finish())
+
+        data = compressor.compress(chunk)
+        return data + compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                compressible = (
+                    start_message["status"] == 200
+                    and "content-encoding" not in headers
+                    and self.COMPRESSIBLE_TYPES.match(headers.get("content-type", ""))
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if not compressible:
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                # the compressed representation is no longer byte-identical
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+
+                if not more_body:
+                    if len(body) >= self.threaded_size:
+                        body = await asyncio.to_thread(self.compress, encoding, body)
+                    else:
+                        body = self.compress(encoding, body)
+
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    start_message = None
+                    return
+
+                # streamed bodies are compressed chunk by chunk and flushed so clients see each chunk
+                del headers["Content-Length"]
+                compressor = self.gen_compressor(encoding)
+                await send(start_message)
 
-        request.state.user_id = user_id
+            await send({
+                "type": "http.response.body",
+                "body": self.flush_compressor(encoding, compressor, body, more_body),
+                "more_body": more_body
+            })
 
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send_compressed)
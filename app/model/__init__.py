@@ -10,3 +10,4 @@ from .like import Like
 from .member import Member
 from .ticket import Ticket
 from .search_query import SearchQuery
+from .event_stats import EventStats
@@ -9,7 +9,7 @@ class EventAlbum(BaseModel):
     __tablename__ = 'EventAlbum'
 
     event_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False, index=True
     )
     img: Mapped[str] = mapped_column(
         String(1000), nullable=False
@@ -1,6 +1,6 @@
 
 from datetime import datetime
-from sqlalchemy import Integer, Enum, DateTime, String, ForeignKey
+from sqlalchemy import Integer, Enum, DateTime, String, ForeignKey, Index, func
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from app.enum import EventFormat
@@ -35,6 +35,9 @@ class Event(BaseModel):
     announced_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=True, default=None
     )
+    like_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     tags: Mapped[list["Tag"]] = relationship(
         "Tag",
@@ -45,12 +48,15 @@ class Event(BaseModel):
 
 class EventTag(BaseModel):
     __tablename__ = 'EventTag'
+    __table_args__ = (
+        Index("ix_EventTag_event_id_tag_id", "event_id", "tag_id", unique=True),
+    )
 
     event_id: Mapped[int] = mapped_column(
         Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
     )
     tag_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('Tag.id', ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey('Tag.id', ondelete="CASCADE"), nullable=False, index=True
     )
 
 
@@ -66,3 +72,46 @@ class Tag(BaseModel):
         secondary="EventTag",
         back_populates="tags"
     )
+
+
+# watermark scan of the stats refresh
+Index(
+    "ix_Event_update_time",
+    Event.update_time,
+)
+# feed keyset on (starting_time, id), with or without a format filter
+Index(
+    "ix_Event_starting_time_id",
+    Event.starting_time,
+    Event.id,
+    postgresql_include=["format"],
+)
+Index(
+    "ix_Event_format_starting_time_id",
+    Event.format,
+    Event.starting_time,
+    Event.id,
+)
+Index(
+    "ix_Event_title_trgm",
+    func.lower(Event.title).label("title_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"title_lower": "gin_trgm_ops"},
+)
+Index(
+    "ix_Event_description_trgm",
+    func.lower(Event.description).label("description_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"description_lower": "gin_trgm_ops"},
+)
+Index(
+    "ix_Tag_name_lower",
+    func.lower(Tag.name),
+    unique=True,
+)
+Index(
+    "ix_Tag_name_trgm",
+    Tag.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+)
@@ -0,0 +1,25 @@
+
+from sqlalchemy import Integer, ForeignKey, Float
+from sqlalchemy.orm import mapped_column, Mapped
+
+from . import BaseModel
+
+
+class EventStats(BaseModel):
+    __tablename__ = 'EventStats'
+
+    event_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False, unique=True
+    )
+    members: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    likes: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    tickets_sold: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    revenue: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0
+    )
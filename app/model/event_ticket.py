@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, ForeignKey, String, Float
+from sqlalchemy import Integer, ForeignKey, String, Float, Index
 from sqlalchemy.orm import mapped_column, Mapped
 
 from . import BaseModel
@@ -7,9 +7,13 @@ from . import BaseModel
 
 class EventTicket(BaseModel):
     __tablename__ = 'EventTicket'
+    __table_args__ = (
+        # watermark scans of the updater and the stats refresh
+        Index("ix_EventTicket_update_time", "update_time"),
+    )
 
     event_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False, index=True
     )
     title: Mapped[str] = mapped_column(
         String(100), nullable=False
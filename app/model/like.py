@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, ForeignKey, String, Float
+from sqlalchemy import Integer, ForeignKey, String, Index
 from sqlalchemy.orm import mapped_column, Mapped
 
 from . import BaseModel
@@ -7,10 +7,13 @@ from . import BaseModel
 
 class Like(BaseModel):
     __tablename__ = 'Like'
+    __table_args__ = (
+        Index("ix_Like_event_id_user_id", "event_id", "user_id", unique=True),
+    )
 
     event_id: Mapped[int] = mapped_column(
         Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
     )
     user_id: Mapped[str] = mapped_column(
-        String(200), nullable=False
+        String(200), nullable=False, index=True
     )
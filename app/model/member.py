@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, ForeignKey, Enum, String
+from sqlalchemy import Integer, ForeignKey, Enum, String, Index
 from sqlalchemy.orm import mapped_column, Mapped
 
 from app.enum import MemberRole
@@ -9,12 +9,16 @@ from . import BaseModel
 
 class Member(BaseModel):
     __tablename__ = 'Member'
+    __table_args__ = (
+        # watermark scan of the stats refresh
+        Index("ix_Member_update_time", "update_time"),
+    )
 
     event_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False, index=True
     )
     user_id: Mapped[str] = mapped_column(
-        String(200), nullable=False
+        String(200), nullable=False, index=True
     )
     role: Mapped[MemberRole] = mapped_column(
         Enum(MemberRole), nullable=False
@@ -9,7 +9,7 @@ class SearchQuery(BaseModel):
     __tablename__ = 'SearchQuery'
 
     user_id: Mapped[str] = mapped_column(
-        String(200), nullable=False
+        String(200), nullable=False, index=True
     )
     value: Mapped[str] = mapped_column(
         String(500), nullable=False
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, ForeignKey, BOOLEAN
+from sqlalchemy import Integer, ForeignKey, BOOLEAN, Index
 from sqlalchemy.orm import mapped_column, Mapped
 
 from . import BaseModel
@@ -7,6 +7,13 @@ from . import BaseModel
 
 class EventSettings(BaseModel):
     __tablename__ = 'EventSettings'
+    __table_args__ = (
+        # feed flag filters are answered from the index without visiting the table
+        Index(
+            "ix_EventSettings_event_id_flags", "event_id",
+            postgresql_include=["is_announced", "is_gathering", "is_dropped"]
+        ),
+    )
 
     event_id: Mapped[int] = mapped_column(
         Integer, ForeignKey('Event.id', ondelete="CASCADE"), nullable=False
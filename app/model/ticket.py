@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, ForeignKey, String, Float
+from sqlalchemy import Integer, ForeignKey, String, Float, Index
 from sqlalchemy.orm import mapped_column, Mapped
 
 from . import BaseModel
@@ -7,10 +7,14 @@ from . import BaseModel
 
 class Ticket(BaseModel):
     __tablename__ = 'Ticket'
+    __table_args__ = (
+        # watermark scans of the updater and the stats refresh
+        Index("ix_Ticket_update_time", "update_time"),
+    )
 
     event_ticket_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('EventTicket.id', ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey('EventTicket.id', ondelete="CASCADE"), nullable=False, index=True
     )
     user_id: Mapped[str] = mapped_column(
-        String(200), nullable=False
+        String(200), nullable=False, index=True
     )
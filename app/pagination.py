@@ -0,0 +1,14 @@
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor -> {cursor}")
+
+    return values
@@ -0,0 +1,119 @@
+import asyncio
+import random
+import re
+from loguru import logger
+
+from config import get_settings
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\$\d+|%\(\w+\)s|%s|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# asyncpg renders bound parameters with a type cast, $1::INTEGER or $1::TIMESTAMP WITH TIME ZONE
+PLACEHOLDER_CAST = r"(?:::\w+(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?(?:\[\])?)?"
+PLACEHOLDER_LIST_PATTERN = re.compile(rf"\?{PLACEHOLDER_CAST}(?:\s*,\s*\?{PLACEHOLDER_CAST})+")
+ROW_LIST_PATTERN = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    # expanded IN lists and multi-row VALUES collapse into the same fingerprint
+    statement = PLACEHOLDER_PATTERN.sub("?", statement)
+    statement = PLACEHOLDER_LIST_PATTERN.sub("?, ...", statement)
+    statement = ROW_LIST_PATTERN.sub("(?, ...), ...", statement)
+    return WHITESPACE_PATTERN.sub(" ", statement).strip()
+
+
+class QueryProfiler:
+    def __init__(self):
+        self.log = logger.bind(classname=self.__class__.__name__)
+
+        settings = get_settings().profiler
+        self.enabled = settings.enabled
+        self.sample_rate = settings.sample_rate
+        self.max_queries = settings.max_queries
+        self.max_repeats = settings.max_repeats
+        self.slow_query_seconds = settings.slow_query_ms / 1000
+        self.explain = settings.explain
+        self.max_explained = settings.max_explained
+
+        self.explained: set[str] = set()
+        self.tasks: set[asyncio.Task] = set()
+
+    def sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def on_statement(self, stats, engine: str, statement: str, parameters, duration: float):
+        if not self.enabled:
+            return
+
+        if stats is not None and stats.fingerprints is not None:
+            stats.fingerprints[fingerprint(statement)] += 1
+
+        if duration < self.slow_query_seconds:
+            return
+
+        source = stats.route if stats is not None else engine
+        self.log.warning(
+            f"Slow query in {source} took {duration * 1000:.1f}ms -> {fingerprint(statement)}"
+        )
+
+        if self.explain:
+            self.schedule_explain(statement, parameters)
+
+    def on_request_end(self, stats):
+        if stats.fingerprints is None:
+            return
+
+        repeated = [
+            (statement, count)
+            for statement, count in stats.fingerprints.most_common(3)
+            if count >= self.max_repeats
+        ]
+        if stats.queries <= self.max_queries and not repeated:
+            return
+
+        lines = [
+            f"{stats.route} issued {stats.queries} queries in {stats.db_seconds * 1000:.1f}ms"
+        ]
+        lines.extend(f"  {count}x {statement}" for statement, count in repeated)
+        self.log.warning("\n".join(lines))
+
+    def schedule_explain(self, statement: str, parameters):
+        key = fingerprint(statement)
+        if key in self.explained or len(self.explained) >= self.max_explained:
+            return
+
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+
+        self.explained.add(key)
+
+        task = asyncio.get_running_loop().create_task(self.run_explain(statement, parameters))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_explain(self, statement: str, parameters):
+        from app.database import get_background_session
+        from app.metrics import REQUEST_STATS
+
+        # the task inherits the request context, keep its statements out of the request stats
+        REQUEST_STATS.set(None)
+
+        try:
+            async with get_background_session() as session:
+                connection = await session.connection()
+                result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                plan = "\n".join(row[0] for row in result.all())
+
+            self.log.warning(f"Plan of {fingerprint(statement)}\n{plan}")
+
+        except Exception as err:
+            self.log.error(f"Failed to explain slow query -> {err}")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,16 @@
+import fastapi
+from pydantic import BaseModel
+
+from config import get_settings
+
+
+def model_response(content: BaseModel, headers: dict[str, str] | None = None) -> BaseModel | fastapi.Response:
+    # the model is already validated, skip response_model validation and serialize it once
+    if not get_settings().app.fast_json:
+        return content
+
+    return fastapi.Response(
+        content=content.model_dump_json(),
+        media_type="application/json",
+        headers=headers
+    )
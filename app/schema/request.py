@@ -1,6 +1,6 @@
 
 from app.enum import EventFormat, MemberRole, RestrictionAction
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CreateEventRequest(BaseModel):
@@ -104,3 +104,4 @@ class UpdateRestrictionRequest(BaseModel):
 class CreateTicketRequest(BaseModel):
     event_ticket_id: int
     user_id: str
+    amount: int = Field(default=1, ge=1, le=100)
@@ -44,6 +44,23 @@ class GetEventData(BaseModel):
     tickets: list[GetEventTicketData] = []
 
 
+class GetEventListData(BaseModel):
+    id: int
+    title: str
+    duration: int
+    format: EventFormat
+    meeting_link: str | None = None
+    location: str | None = None
+    starting_time: int | None = None
+    announced_at: int | None = None
+
+    likes: int | None = None
+    bought: int | None = None
+
+    tags: list[str] = []
+    tickets: list[GetEventTicketData] = []
+
+
 class CreateEventTicketData(BaseModel):
     id: int
 
@@ -91,7 +108,7 @@ class GetMemberData(BaseModel):
 
 
 class UpdateTagData(BaseModel):
-    id: list[int]
+    id: int
 
 
 class SearchTagData(BaseModel):
@@ -145,6 +162,15 @@ class GetManyEventsResponse(BaseModel):
     description: str | None = None
 
     data: list[GetEventData] = Field(default_factory=list)
+    cursor: str | None = None
+
+
+class GetCompactEventsResponse(BaseModel):
+    status: ResponseStatus = ResponseStatus.ok
+    description: str | None = None
+
+    data: list[GetEventListData] = Field(default_factory=list)
+    cursor: str | None = None
 
 
 class LikeResponse(BaseModel):
@@ -292,6 +318,8 @@ class DeleteEventTicketResponse(BaseModel):
 
 class CreateTicketData(BaseModel):
     id: int
+    ids: list[int] = Field(default_factory=list)
+    stock: int | None = None
 
 
 class GetTicketData(BaseModel):
@@ -329,6 +357,9 @@ class GetManyTicketResponse(BaseModel):
 class GetMyStatsData(BaseModel):
     total_events: int
     total_members: int
+    total_likes: int = 0
+    total_tickets_sold: int = 0
+    total_revenue: float = 0
 
 
 class GetMyStatsResponse(BaseModel):
@@ -340,6 +371,9 @@ class GetMyStatsResponse(BaseModel):
 
 class GetEventStatsData(BaseModel):
     total_members: int
+    total_likes: int = 0
+    total_tickets_sold: int = 0
+    total_revenue: float = 0
 
 
 class GetEventStatsResponse(BaseModel):
@@ -354,6 +388,10 @@ class GetUserEventsData(BaseModel):
     appreciated: list[GetEventData] = Field(default_factory=list)
     acquired: list[GetEventData] = Field(default_factory=list)
 
+    owned_cursor: str | None = None
+    appreciated_cursor: str | None = None
+    acquired_cursor: str | None = None
+
 
 class GetUserEventsResponse(BaseModel):
     status: ResponseStatus = ResponseStatus.ok
@@ -362,6 +400,47 @@ class GetUserEventsResponse(BaseModel):
     data: GetUserEventsData | None = None
 
 
+class GetEventsBatchData(BaseModel):
+    events: list[GetEventData] = Field(default_factory=list)
+    missing: list[int] = Field(default_factory=list)
+
+
+class GetEventsBatchResponse(BaseModel):
+    status: ResponseStatus = ResponseStatus.ok
+    description: str | None = None
+
+    data: GetEventsBatchData | None = None
+
+
+class GetPoolMetricsData(BaseModel):
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    wait_seconds: float
+    max_wait_seconds: float
+
+
+class GetCacheMetricsData(BaseModel):
+    name: str
+    hits: int
+    misses: int
+
+
+class GetMetricsData(BaseModel):
+    pools: list[GetPoolMetricsData] = Field(default_factory=list)
+    caches: list[GetCacheMetricsData] = Field(default_factory=list)
+
+
+class GetMetricsResponse(BaseModel):
+    status: ResponseStatus = ResponseStatus.ok
+    description: str | None = None
+
+    data: GetMetricsData | None = None
+
+
 class GetSearchHistoryData(BaseModel):
     id: int
     value: str
@@ -0,0 +1,127 @@
+import asyncio
+from loguru import logger
+
+from sqlalchemy import select, insert, delete, func, tuple_
+
+from app.model import SearchQuery
+
+from app.database import get_background_session
+
+from config import get_settings
+
+
+# asyncpg accepts at most 32767 bind parameters, every query takes two in the insert and the delete
+MAX_BATCH_SIZE = 32767 // 2
+
+STOP = None
+
+
+class SearchHistoryRecorder:
+    def __init__(self):
+        self.log = logger.bind(classname=self.__class__.__name__)
+
+        settings = get_settings().search_history
+        self.batch_size = min(settings.batch_size, MAX_BATCH_SIZE)
+        self.flush_interval = settings.flush_interval_seconds
+        self.max_per_user = settings.max_per_user
+
+        self.queue: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue(maxsize=settings.queue_size)
+        self.task: asyncio.Task | None = None
+
+    def record(self, user_id: str, value: str):
+        try:
+            self.queue.put_nowait((user_id, value[:500]))
+
+        except asyncio.QueueFull:
+            self.log.warning(f"Search history queue is full, dropping query of {user_id}")
+
+    async def flush(self, batch: list[tuple[str, str]]):
+        # user_id is NOT NULL, one anonymous query would fail the insert of the whole batch
+        batch = [(user_id, value) for user_id, value in batch if user_id]
+        if not batch:
+            return
+
+        # repeats keep only their latest position
+        queries = list(dict.fromkeys(reversed(batch)))[::-1]
+        user_ids = list({user_id for user_id, _ in queries})
+
+        async with get_background_session() as session:
+            await session.execute(
+                delete(SearchQuery)
+                .where(tuple_(SearchQuery.user_id, SearchQuery.value).in_(queries))
+            )
+
+            await session.execute(
+                insert(SearchQuery)
+                .values([
+                    {"user_id": user_id, "value": value}
+                    for user_id, value in queries
+                ])
+            )
+
+            ranked = (
+                select(
+                    SearchQuery.id,
+                    func.row_number().over(
+                        partition_by=SearchQuery.user_id,
+                        order_by=SearchQuery.id.desc()
+                    ).label("position")
+                )
+                .where(SearchQuery.user_id.in_(user_ids))
+                .subquery()
+            )
+            await session.execute(
+                delete(SearchQuery)
+                .where(SearchQuery.id.in_(
+                    select(ranked.c.id)
+                    .where(ranked.c.position > self.max_per_user)
+                ))
+            )
+
+            await session.commit()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size and batch[-1] is not STOP:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+
+                except asyncio.TimeoutError:
+                    break
+
+            if batch[-1] is STOP:
+                stopping = True
+                batch.pop()
+
+            if not batch:
+                continue
+
+            try:
+                await self.flush(batch)
+
+            except Exception as err:
+                self.log.error(f"Failed to record {len(batch)} search queries -> {err}")
+                self.log.exception(err)
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            # everything queued before the marker is flushed, a flush in progress is never cancelled
+            await self.queue.put(STOP)
+            await self.task
+            self.task = None
+
+
+search_history = SearchHistoryRecorder()
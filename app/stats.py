@@ -0,0 +1,122 @@
+from sqlalchemy import select, func, and_, union
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.enum import MemberRole
+from app.model import Event, Member, EventTicket, Ticket, EventStats
+
+from config import get_settings
+
+
+STATS_COLUMNS = ("members", "likes", "tickets_sold", "revenue")
+
+
+def gen_owned_events_query(user_id: str) -> Select:
+    return (
+        select(Member.event_id)
+        .where(
+            and_(
+                Member.user_id == user_id,
+                Member.role == MemberRole.owner
+            )
+        )
+        .correlate(None)
+    )
+
+
+def gen_touched_events_query(since) -> Select:
+    # these are nested into queries over the same tables, keep them uncorrelated
+    return union(
+        select(Event.id).where(Event.update_time >= since).correlate(None),
+        select(Member.event_id).where(Member.update_time >= since).correlate(None),
+        select(EventTicket.event_id).where(EventTicket.update_time >= since).correlate(None),
+        select(EventTicket.event_id)
+        .join(Ticket, Ticket.event_ticket_id == EventTicket.id)
+        .where(Ticket.update_time >= since)
+        .correlate(None),
+    )
+
+
+def gen_live_stats_query(event_ids) -> Select:
+    members = (
+        select(
+            Member.event_id,
+            func.count(Member.id).label("members")
+        )
+        .where(Member.event_id.in_(event_ids))
+        .group_by(Member.event_id)
+        .subquery()
+    )
+    tickets = (
+        select(
+            EventTicket.event_id,
+            func.count(Ticket.id).label("tickets_sold"),
+            func.sum(EventTicket.price).label("revenue")
+        )
+        .join(Ticket, Ticket.event_ticket_id == EventTicket.id)
+        .where(EventTicket.event_id.in_(event_ids))
+        .group_by(EventTicket.event_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Event.id.label("event_id"),
+            func.coalesce(members.c.members, 0).label("members"),
+            Event.like_count.label("likes"),
+            func.coalesce(tickets.c.tickets_sold, 0).label("tickets_sold"),
+            func.coalesce(tickets.c.revenue, 0).label("revenue"),
+        )
+        .outerjoin(members, members.c.event_id == Event.id)
+        .outerjoin(tickets, tickets.c.event_id == Event.id)
+        .where(Event.id.in_(event_ids))
+    )
+
+
+def gen_summary_stats_query(event_ids) -> Select:
+    # events created since the last refresh have no summary row yet, they still count with zeros
+    return (
+        select(
+            Event.id.label("event_id"),
+            *[
+                func.coalesce(getattr(EventStats, column), 0).label(column)
+                for column in STATS_COLUMNS
+            ]
+        )
+        .outerjoin(EventStats, EventStats.event_id == Event.id)
+        .where(Event.id.in_(event_ids))
+    )
+
+
+def gen_stats_query(event_ids) -> Select:
+    if get_settings().stats.summary:
+        return gen_summary_stats_query(event_ids)
+
+    return gen_live_stats_query(event_ids)
+
+
+def gen_total_stats_query(event_ids) -> Select:
+    stats = gen_stats_query(event_ids).subquery()
+
+    return select(
+        func.count(stats.c.event_id).label("events"),
+        *[
+            func.coalesce(func.sum(stats.c[column]), 0).label(column)
+            for column in STATS_COLUMNS
+        ]
+    )
+
+
+def gen_refresh_stats_query(event_ids):
+    statement = insert(EventStats).from_select(
+        ["event_id", *STATS_COLUMNS],
+        gen_live_stats_query(event_ids)
+    )
+
+    return statement.on_conflict_do_update(
+        index_elements=[EventStats.event_id],
+        set_={
+            **{column: statement.excluded[column] for column in STATS_COLUMNS},
+            "update_time": func.now(),
+        }
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator
+
+from app.enum import ImageSize
+
+from config import get_settings
+
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+)
+SIGNATURE_SIZE = 12
+
+DERIVATIVE_EXTENSION = ".webp"
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+class InvalidImageError(Exception):
+    pass
+
+
+def detect_image_type(head: bytes) -> tuple[str, str] | None:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+
+    for signature, media_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return media_type, extension
+
+    return None
+
+
+def get_image_path(name: str) -> str:
+    return os.path.join(get_settings().album.path, name)
+
+
+def get_derivative_name(name: str, size: ImageSize) -> str:
+    if size == ImageSize.full:
+        return name
+
+    stem, _ = os.path.splitext(name)
+    return f"{stem}.{size.value}{DERIVATIVE_EXTENSION}"
+
+
+def get_image_url(name: str, size: ImageSize = ImageSize.full) -> str:
+    url = f"{get_settings().album.url}{name}"
+    if size != ImageSize.full:
+        url += f"?size={size.value}"
+
+    return url
+
+
+def get_media_type(path: str) -> str:
+    # images uploaded before content addressing have no extension
+    return mimetypes.guess_type(path)[0] or "image/jpeg"
+
+
+def write_chunk(file, digest, data: bytes):
+    digest.update(data)
+    file.write(data)
+
+
+async def save_image(chunks: AsyncIterator[bytes]) -> str:
+    settings = get_settings().album
+
+    await asyncio.to_thread(os.makedirs, settings.path, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=settings.path, suffix=".part")
+    file = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+
+    try:
+        size = 0
+        buffer = bytearray()
+        image_type = None
+
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.max_size_bytes:
+                raise InvalidImageError(f"Image is larger than {settings.max_size_bytes} bytes")
+
+            buffer += chunk
+            if image_type is None and len(buffer) >= SIGNATURE_SIZE:
+                image_type = detect_image_type(bytes(buffer[:SIGNATURE_SIZE]))
+                if image_type is None:
+                    raise InvalidImageError("Unsupported image type")
+
+            # disk writes are batched so small network chunks do not each cost a thread hop
+            if len(buffer) >= settings.write_buffer_bytes:
+                await asyncio.to_thread(write_chunk, file, digest, bytes(buffer))
+                buffer.clear()
+
+        if image_type is None:
+            image_type = detect_image_type(bytes(buffer))
+            if image_type is None:
+                raise InvalidImageError("Unsupported image type")
+
+        if buffer:
+            await asyncio.to_thread(write_chunk, file, digest, bytes(buffer))
+
+        await asyncio.to_thread(file.close)
+
+        # identical uploads share one file
+        name = f"{digest.hexdigest()}{image_type[1]}"
+        await asyncio.to_thread(os.replace, temp_path, get_image_path(name))
+
+    except BaseException:
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(remove_file, temp_path)
+        raise
+
+    return name
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+
+    except FileNotFoundError:
+        pass
+
+
+def remove_image(name: str):
+    remove_file(get_image_path(name))
+    for size in ImageSize:
+        if size != ImageSize.full:
+            remove_file(get_image_path(get_derivative_name(name, size)))
+
+
+def render_derivatives(source: str, targets: list[tuple[str, int]], quality: int) -> bool:
+    # runs in a worker process
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError):
+        return False
+
+    except OSError as err:
+        # decoders report truncated or corrupt data as a bare OSError, real I/O failures carry an errno
+        if err.errno is None:
+            return False
+        raise
+
+    for target, size in targets:
+        if os.path.isfile(target):
+            continue
+
+        derivative = image.copy()
+        derivative.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        temp_path = f"{target}.{os.getpid()}.part"
+        try:
+            derivative.save(temp_path, format="WEBP", quality=quality, method=4)
+            os.replace(temp_path, target)
+
+        except BaseException:
+            remove_file(temp_path)
+            raise
+
+    return True
+
+
+class ImagePipeline:
+    def __init__(self):
+        self.executor: ProcessPoolExecutor | None = None
+
+    async def create_derivatives(self, name: str):
+        settings = get_settings().album
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=settings.process_workers)
+
+        targets = [
+            (get_image_path(get_derivative_name(name, ImageSize.thumb)), settings.thumb_size),
+            (get_image_path(get_derivative_name(name, ImageSize.medium)), settings.medium_size),
+        ]
+
+        rendered = await asyncio.get_running_loop().run_in_executor(
+            self.executor, render_derivatives, get_image_path(name), targets, settings.quality
+        )
+        if not rendered:
+            raise InvalidImageError("Image can not be decoded")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+image_pipeline = ImagePipeline()
@@ -1,11 +1,18 @@
 
 import asyncio
+import time
+from datetime import timedelta
 from loguru import logger
 
-from sqlalchemy import select, func, update
-from app.model import EventTicket, Ticket, Event
+from sqlalchemy import select, func, update, union, literal, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.model import EventTicket, Ticket, Event, Like
 
-from app.database import get_async_session
+from app.database import get_background_session, connect_unpooled
+from app.cache import invalidate_events
+from app.stats import gen_touched_events_query, gen_refresh_stats_query
+from app.metrics import UPDATER_TASK_DURATION, UPDATER_TASK_ERRORS
 
 from config import get_settings
 
@@ -14,44 +21,246 @@ class Updater:
     def __init__(self):
         self.log = logger.bind(classname=self.__class__.__name__)
 
-        self.tasks = [self.calc_stock]
+        self.delay = get_settings().updater.task_delay_seconds
+
+        self.tasks = [
+            (self.calc_stock, self.delay),
+            (self.reconcile_likes, get_settings().updater.likes_reconcile_delay_seconds),
+        ]
         self.__tasks = []
+        self.election: asyncio.Task | None = None
 
-        self.delay = get_settings().updater.task_delay_seconds
+        self.leader_lock_id = get_settings().updater.leader_lock_id
+        self.leader_check_delay = get_settings().updater.leader_check_delay_seconds
+
+        if get_settings().stats.summary:
+            self.tasks.append((self.refresh_stats, get_settings().stats.refresh_delay_seconds))
+
+        self.stats_overlap = timedelta(seconds=get_settings().stats.watermark_overlap_seconds)
+        self.stats_watermark = None
+
+        self.stock_overlap = timedelta(seconds=get_settings().updater.stock_watermark_overlap_seconds)
+        self.stock_watermark = None
 
     async def calc_stock(self):
-        async with get_async_session() as session:
-            event_tickets = (await session.execute(
-                select(EventTicket)
+        started = time.perf_counter()
+
+        async with get_background_session() as session:
+            watermark = (await session.execute(select(func.now()))).scalar()
+
+            touched = select(EventTicket.id)
+
+            # the first run after start recalculates everything
+            if self.stock_watermark:
+                since = self.stock_watermark - self.stock_overlap
+                touched = touched.where(
+                    EventTicket.id.in_(union(
+                        select(Ticket.event_ticket_id).where(Ticket.update_time >= since).correlate(None),
+                        select(EventTicket.id).where(EventTicket.update_time >= since).correlate(None),
+                    ))
+                )
+
+            # purchases decrement stock under this row lock, without it a
+            # concurrent sale could be overwritten by a stale count
+            locked_ids = (await session.execute(
+                touched
+                .order_by(EventTicket.id)
+                .with_for_update()
+            )).scalars().all()
+
+            if not locked_ids:
+                self.stock_watermark = watermark
+                return
+
+            # only the locked rows are recounted, rows touched after the lock are left to the next run
+            locked = EventTicket.id == any_(bindparam("locked_ids", locked_ids, type_=ARRAY(Integer)))
+
+            bought = (
+                select(
+                    EventTicket.id.label("event_ticket_id"),
+                    func.count(Ticket.id).label("bought")
+                )
+                .outerjoin(Ticket, Ticket.event_ticket_id == EventTicket.id)
+                .where(locked)
+                .group_by(EventTicket.id)
+                .subquery()
+            )
+
+            result = await session.execute(
+                update(EventTicket)
+                .where(
+                    locked,
+                    EventTicket.id == bought.c.event_ticket_id,
+                    EventTicket.stock.is_distinct_from(EventTicket.amount - bought.c.bought)
+                )
+                .values(stock=EventTicket.amount - bought.c.bought)
+                .returning(EventTicket.event_id)
+                .execution_options(synchronize_session=False)
+            )
+            event_ids = result.scalars().all()
+
+            await session.commit()
+
+        # cached events would keep serving the old stock under their ETag
+        await invalidate_events(*set(event_ids))
+
+        self.stock_watermark = watermark
+        self.log.debug(
+            f"Recalculated stock -> {len(event_ids)} rows in {time.perf_counter() - started:.3f}s"
+        )
+
+    async def reconcile_likes(self):
+        started = time.perf_counter()
+
+        likes = (
+            select(
+                Event.id.label("event_id"),
+                func.count(Like.id).label("likes")
+            )
+            .outerjoin(Like, Like.event_id == Event.id)
+            .group_by(Event.id)
+        )
+
+        async with get_background_session() as session:
+            likes_subquery = likes.subquery()
+            drifted = (await session.execute(
+                select(likes_subquery.c.event_id)
+                .join(Event, Event.id == likes_subquery.c.event_id)
+                .where(Event.like_count != likes_subquery.c.likes)
             )).scalars().all()
 
-            for event_ticket in event_tickets:
-                bought = (await session.execute(
-                    select(func.count()).select_from(Ticket).where(Ticket.event_ticket_id == event_ticket.id)
-                )).scalar()
+            if not drifted:
+                return
 
-                event_ticket.stock = event_ticket.amount - bought
-                session.execute(
-                    update(EventTicket)
-                    .where(EventTicket.id == event_ticket.id)
+            # toggles update the counter under this row lock, so the recount
+            # below sees every committed like of the locked events
+            await session.execute(
+                select(Event.id)
+                .where(Event.id.in_(drifted))
+                .order_by(Event.id)
+                .with_for_update()
+            )
+
+            likes_subquery = likes.where(Event.id.in_(drifted)).subquery()
+            result = await session.execute(
+                update(Event)
+                .where(
+                    Event.id == likes_subquery.c.event_id,
+                    Event.like_count != likes_subquery.c.likes
                 )
+                .values(like_count=likes_subquery.c.likes)
+                .returning(Event.id)
+                .execution_options(synchronize_session=False)
+            )
+            event_ids = result.scalars().all()
+
+            await session.commit()
+
+        await invalidate_events(*event_ids)
+
+        self.log.warning(
+            f"Reconciled like counters -> {len(event_ids)} rows in {time.perf_counter() - started:.3f}s"
+        )
+
+    async def refresh_stats(self):
+        started = time.perf_counter()
+
+        async with get_background_session() as session:
+            watermark = (await session.execute(select(func.now()))).scalar()
+
+            # the first run after start refreshes everything
+            if self.stats_watermark:
+                event_ids = gen_touched_events_query(self.stats_watermark - self.stats_overlap)
+            else:
+                event_ids = select(Event.id).correlate(None)
+
+            result = await session.execute(gen_refresh_stats_query(event_ids))
 
             await session.commit()
 
-    async def task_wrapper(self, func):
+        self.stats_watermark = watermark
+        self.log.debug(
+            f"Refreshed event stats -> {result.rowcount} rows in {time.perf_counter() - started:.3f}s"
+        )
+
+    async def task_wrapper(self, func, delay: int):
         while True:
+            started = time.perf_counter()
+
             try:
                 await func()
 
             except Exception as err:
+                UPDATER_TASK_ERRORS.inc(func.__name__)
                 self.log.error(f"Occurred error with {func.__name__} -> {err}")
                 self.log.exception(err)
 
-            await asyncio.sleep(self.delay)
+            UPDATER_TASK_DURATION.observe(time.perf_counter() - started, func.__name__)
+
+            await asyncio.sleep(delay)
 
-    async def start(self):
+    async def start_tasks(self):
         self.log.info(f"Starting updater tasks")
 
-        for task in self.tasks:
-            self.tasks.append(asyncio.create_task(self.task_wrapper(task)))
+        for task, delay in self.tasks:
+            self.__tasks.append(asyncio.create_task(self.task_wrapper(task, delay)))
             self.log.info(f"Started task -> {task.__name__}")
+
+    async def stop_tasks(self):
+        for task in self.__tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks.clear()
+
+    async def lead(self):
+        # every worker runs an election, only the holder of the advisory lock runs the tasks
+        while True:
+            try:
+                # session level advisory locks belong to the backend, so the lock, the pings
+                # and the unlock all go through one connection that is held for the whole term,
+                # it is opened outside the background pool so the tasks keep every pool slot
+                async with connect_unpooled() as connection:
+                    is_leader = (await connection.execute(
+                        select(func.pg_try_advisory_lock(self.leader_lock_id))
+                    )).scalar()
+                    await connection.commit()
+
+                    if is_leader:
+                        await self.hold_leadership(connection)
+
+            except Exception as err:
+                self.log.error(f"Lost updater leadership -> {err}")
+
+            await asyncio.sleep(self.leader_check_delay)
+
+    async def hold_leadership(self, connection: AsyncConnection):
+        self.log.info(f"Acquired updater leadership")
+
+        try:
+            await self.start_tasks()
+
+            # the lock lives as long as this connection, stop as soon as it is gone
+            while True:
+                await asyncio.sleep(self.leader_check_delay)
+                await connection.execute(select(literal(1)))
+                await connection.commit()
+
+        finally:
+            await self.stop_tasks()
+
+            try:
+                await connection.execute(select(func.pg_advisory_unlock(self.leader_lock_id)))
+                await connection.commit()
+
+            except Exception as err:
+                self.log.warning(f"Failed to release updater leadership -> {err}")
+
+    def start(self):
+        self.election = asyncio.create_task(self.lead())
+
+    async def stop(self):
+        if self.election:
+            self.election.cancel()
+            await asyncio.gather(self.election, return_exceptions=True)
+            self.election = None
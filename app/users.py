@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import fastapi
+from loguru import logger
+
+from app.cache import TTLCache, MISSING
+from app.client import get_client_session
+from app.metrics import USER_SERVICE_DURATION
+
+from config import get_settings
+
+
+PROFILE_FIELDS = ("id", "firstName", "lastName", "avatar")
+
+_PROFILES = TTLCache(
+    maxsize=get_settings().services.user_cache_size,
+    ttl=get_settings().services.user_cache_ttl_seconds
+)
+
+
+async def fetch_users(user_ids: list[str], cookies: dict) -> dict[str, dict]:
+    started = time.perf_counter()
+
+    async with get_client_session().get(
+        url=f"{get_settings().services.user.rstrip('/')}/users/many",
+        params=[("ids", user_id) for user_id in user_ids],
+        cookies=cookies
+    ) as response:
+        USER_SERVICE_DURATION.observe(time.perf_counter() - started, "/users/many", response.status)
+        response.raise_for_status()
+
+        data = await response.json()
+
+    return {
+        row["id"]: {field: row.get(field) for field in PROFILE_FIELDS}
+        for row in data
+    }
+
+
+class UserLoader:
+    def __init__(self, cookies: dict):
+        self.log = logger.bind(classname=self.__class__.__name__)
+
+        self.cookies = cookies
+        self.users: dict[str, dict] = {}
+
+    async def load_many(self, user_ids: list[str]) -> dict[str, dict]:
+        missing = []
+
+        for user_id in dict.fromkeys(user_ids):
+            if user_id in self.users:
+                continue
+
+            user = _PROFILES.get(user_id, MISSING)
+            if user is MISSING:
+                missing.append(user_id)
+            else:
+                self.users[user_id] = user
+
+        if missing:
+            chunk_size = get_settings().services.user_chunk_size
+            chunks = await asyncio.gather(*[
+                fetch_users(missing[i:i + chunk_size], self.cookies)
+                for i in range(0, len(missing), chunk_size)
+            ])
+
+            for users in chunks:
+                for user_id, user in users.items():
+                    _PROFILES.set(user_id, user)
+                    self.users[user_id] = user
+
+            self.log.debug(f"Fetched {len(missing)} users in {len(chunks)} chunks")
+
+        return {
+            user_id: self.users[user_id]
+            for user_id in user_ids
+            if user_id in self.users
+        }
+
+
+def get_user_loader(request: fastapi.Request) -> UserLoader:
+    loader = getattr(request.state, "user_loader", None)
+    if loader is None:
+        loader = UserLoader(cookies=request.cookies)
+        request.state.user_loader = loader
+
+    return loader
@@ -0,0 +1,127 @@
+"""Throughput of CheckAuthMiddleware against the BaseHTTPMiddleware version it replaced.
+
+Requests are driven straight through the ASGI stack, no server or network is involved.
+Both middlewares authenticate by the internal api_key cookie so the user service is never called.
+
+    python -m benchmarks.auth_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+for key, value in {
+    "DATABASE__PASSWORD": "postgres",
+    "APP__KEY": "benchmark",
+    "LOGGER__LEVEL": "INFO",
+    "UPDATER__TASK_DELAY_SECONDS": "1",
+    "SERVICES__USER": "http://127.0.0.1",
+    "SERVICES__USER_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.middlewares import CheckAuthMiddleware
+
+from config import get_settings
+
+
+class LegacyCheckAuthMiddleware(BaseHTTPMiddleware):
+    # the pre ASGI implementation, reduced to the api_key branch exercised here
+    async def dispatch(self, request: Request, call_next):
+        url_parts = str(request.url).split("/")
+
+        dest = url_parts[-1]
+        if dest in ["docs", "openapi.json"]:
+            return await call_next(request)
+
+        dest_path = str(request.url).split("/")[-2]
+        if dest_path in ["album"]:
+            return await call_next(request)
+
+        key = request.cookies.get("api_key")
+        if key != get_settings().app.key:
+            return JSONResponse(status_code=401, content={"detail": "You are not allowed to access this endpoint"})
+
+        request.state.user_id = request.cookies.get("user_id")
+
+        return await call_next(request)
+
+
+async def plain_app(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+async def streaming_app(scope, receive, send):
+    async def chunks():
+        for _ in range(16):
+            yield b"x" * 1024
+
+    await StreamingResponse(chunks())(scope, receive, send)
+
+
+def gen_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"cookie", f"api_key={get_settings().app.key}; user_id=benchmark".encode()),
+        ],
+    }
+
+
+async def run(middleware, path: str, requests: int) -> float:
+    received = False
+    connected = asyncio.Event()
+
+    # like a client that stays connected until the response is complete
+    async def receive():
+        nonlocal received
+        if received:
+            await connected.wait()
+
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        received = False
+        await middleware(gen_scope(path), receive, send)
+
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int):
+    cases = [
+        ("plain", plain_app, "/mine"),
+        ("streaming", streaming_app, "/search"),
+    ]
+
+    print(f"{'case':<12}{'BaseHTTPMiddleware':>22}{'pure ASGI':>14}{'speedup':>10}")
+    for name, app, path in cases:
+        legacy = await run(LegacyCheckAuthMiddleware(app), path, requests)
+        current = await run(CheckAuthMiddleware(app), path, requests)
+        print(f"{name:<12}{legacy:>18.0f} r/s{current:>10.0f} r/s{current / legacy:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests))
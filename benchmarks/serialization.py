@@ -0,0 +1,122 @@
+"""Serialization time of event lists, FastAPI's response_model path against APP__FAST_JSON.
+
+Times building the response body for pages of events the way /search returns them:
+through the route's response_model with the stdlib json and the orjson response classes,
+and through model_response, which dumps the already validated model once.
+
+    python -m benchmarks.serialization --events 1000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+for key, value in {
+    "DATABASE__PASSWORD": "postgres",
+    "APP__KEY": "benchmark",
+    "LOGGER__LEVEL": "INFO",
+    "UPDATER__TASK_DELAY_SECONDS": "1",
+    "SERVICES__USER": "http://127.0.0.1",
+    "SERVICES__USER_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+import fastapi
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+
+from app.enum import EventFormat
+from app.endpoint import event_router
+from app.schema.response import (
+    GetManyEventsResponse, GetCompactEventsResponse,
+    GetEventData, GetEventListData, GetEventTicketData
+)
+
+
+def gen_events(count: int) -> list[GetEventData]:
+    return [
+        GetEventData(
+            id=i,
+            title=f"Event {i}",
+            description="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            duration=120,
+            format=EventFormat.offline,
+            location="Kyiv",
+            starting_time=1_800_000_000 + i,
+            likes=i % 50,
+            bought=0,
+            tags=["music", "outdoor", "weekend"],
+            album=[f"https://bots.innova.ua/api/event/album/{i:064x}.jpg?size=thumb"] * 2,
+            tickets=[
+                GetEventTicketData(
+                    id=i * 10 + n,
+                    title=f"Ticket {n}",
+                    description="Entrance",
+                    price=100.0 * (n + 1),
+                    stock=10,
+                    amount=20
+                )
+                for n in range(3)
+            ]
+        )
+        for i in range(count)
+    ]
+
+
+async def response_model_path(content, response_class) -> bytes:
+    # what FastAPI does with a returned model: validate against response_model, encode, render
+    route = next(route for route in event_router.routes if route.path == "/search")
+    encoded = await serialize_response(field=route.response_field, response_content=content)
+    return response_class(content=encoded).body
+
+
+async def fast_path(content, response_class) -> bytes:
+    return fastapi.Response(content=content.model_dump_json(), media_type="application/json").body
+
+
+async def measure(path, content, response_class, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await path(content, response_class)
+        timings.append(time.perf_counter() - started)
+
+    return min(timings)
+
+
+async def main(count: int, rounds: int):
+    events = gen_events(count)
+    full = GetManyEventsResponse(data=events)
+    compact = GetCompactEventsResponse(data=[
+        GetEventListData(**event.model_dump(exclude={"description", "album"}))
+        for event in events
+    ])
+
+    cases = [
+        ("response_model + json", response_model_path, full, JSONResponse),
+        ("response_model + orjson", response_model_path, full, ORJSONResponse),
+        ("fast path", fast_path, full, None),
+        ("fast path, compact", fast_path, compact, None),
+    ]
+
+    baseline = None
+    print(f"{count} events, best of {rounds} rounds")
+    print(f"{'path':<28}{'ms':>10}{'ms/1000':>10}{'KB':>9}{'speedup':>10}")
+    for name, path, content, response_class in cases:
+        seconds = await measure(path, content, response_class, rounds)
+        size = len(await path(content, response_class))
+        baseline = baseline or seconds
+
+        print(
+            f"{name:<28}{seconds * 1000:>10.2f}{seconds * 1000 * 1000 / count:>10.2f}"
+            f"{size / 1024:>9.0f}{baseline / seconds:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.events, args.rounds))
@@ -12,12 +12,29 @@ class Database(BaseModel):
     port: int = 5432
     db: str = "paydb"
 
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 600
+    pool_pre_ping: bool = True
+    prepared_statement_cache_size: int = 100
+    background_pool_size: int = 3
+    background_max_overflow: int = 0
+
 
 class App(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
     path: str = ""
     key: str = "???????"
+    metrics_token: str = ""
+    fast_json: bool = False
+    workers: int = 1
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: int = 30
 
 
 class Logger(BaseModel):
@@ -27,11 +44,76 @@ class Logger(BaseModel):
 
 class Updater(BaseModel):
     task_delay_seconds: int
+    stock_watermark_overlap_seconds: int = 30
+    likes_reconcile_delay_seconds: int = 300
+    leader_lock_id: int = 7301001
+    leader_check_delay_seconds: int = 10
+
+
+class Cache(BaseModel):
+    backend: str = "memory"
+    url: str = "redis://127.0.0.1:6379/0"
+    size: int = 10000
+    ttl_seconds: float = 60.0
+
+
+class Autocomplete(BaseModel):
+    reload_delay_seconds: float = 60.0
+
+
+class SearchHistory(BaseModel):
+    queue_size: int = 10000
+    batch_size: int = 500
+    flush_interval_seconds: float = 1.0
+    max_per_user: int = 50
+
+
+class Stats(BaseModel):
+    summary: bool = False
+    refresh_delay_seconds: int = 60
+    watermark_overlap_seconds: int = 30
+
+
+class Compression(BaseModel):
+    enabled: bool = True
+    minimum_size: int = 1024
+    threaded_size: int = 256 * 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+
+class Album(BaseModel):
+    path: str = "./resources/images"
+    url: str = "https://bots.innova.ua/api/event/album/"
+    max_size_bytes: int = 10 * 1024 * 1024
+    write_buffer_bytes: int = 1024 * 1024
+    thumb_size: int = 320
+    medium_size: int = 1024
+    quality: int = 80
+    process_workers: int = 2
+
+
+class Profiler(BaseModel):
+    enabled: bool = False
+    sample_rate: float = 1.0
+    max_queries: int = 20
+    max_repeats: int = 5
+    slow_query_ms: float = 200.0
+    explain: bool = False
+    max_explained: int = 100
 
 
 class Services(BaseModel):
     user: str
     user_key: str
+    pool_size: int = 100
+    timeout_seconds: float = 5.0
+    auth_cache_size: int = 10000
+    auth_cache_ttl_seconds: float = 60.0
+    auth_negative_ttl_seconds: float = 5.0
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 300.0
+    user_chunk_size: int = 100
 
 
 class Settings(BaseSettings):
@@ -40,6 +122,13 @@ class Settings(BaseSettings):
     logger: Logger
     updater: Updater
     services: Services
+    cache: Cache = Cache()
+    search_history: SearchHistory = SearchHistory()
+    autocomplete: Autocomplete = Autocomplete()
+    stats: Stats = Stats()
+    profiler: Profiler = Profiler()
+    album: Album = Album()
+    compression: Compression = Compression()
 
     @computed_field
     @property
@@ -0,0 +1,13 @@
+import os
+
+
+# settings without defaults, the tests never connect to these services
+for key, value in {
+    "DATABASE__PASSWORD": "postgres",
+    "APP__KEY": "key",
+    "LOGGER__LEVEL": "DEBUG",
+    "UPDATER__TASK_DELAY_SECONDS": "1",
+    "SERVICES__USER": "http://127.0.0.1",
+    "SERVICES__USER_KEY": "key",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,26 @@
+from app.autocomplete import TagIndex
+
+
+def make_index() -> TagIndex:
+    index = TagIndex()
+    index.loaded = True
+    return index
+
+
+def test_tags_differing_in_case_are_indexed_once():
+    index = make_index()
+    index.add_tag(1, "Python")
+    index.update(tags={"python": 1}, added=[1], removed=[])
+    index.add_tag(2, "PYTHON")
+
+    assert index.names == ["python"]
+    assert index.search("pyth", 10) == [(1, "Python")]
+    assert index.popularity["python"] == 1
+
+
+def test_search_matches_any_case():
+    index = make_index()
+    index.add_tag(1, "Rust")
+    index.add_tag(2, "rusty")
+
+    assert [tag_id for tag_id, _ in index.search("RUST", 10)] == [1, 2]
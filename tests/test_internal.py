@@ -0,0 +1,58 @@
+import asyncio
+
+import fastapi
+
+from app.endpoint.internal import internal_router
+from app.middlewares import CheckAuthMiddleware
+
+from config import get_settings
+
+
+def request(path: str, headers: list[tuple[bytes, bytes]]) -> tuple[int, bytes]:
+    app = fastapi.FastAPI()
+    app.include_router(internal_router)
+    app.add_middleware(CheckAuthMiddleware)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), *headers],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], body
+
+
+def test_prometheus_skips_user_auth_and_checks_token():
+    # no user cookie, the user service is never asked
+    assert request("/internal/prometheus", [])[0] == 401
+    assert request("/internal/prometheus", [(b"authorization", b"Bearer wrong")])[0] == 401
+
+    status, body = request("/internal/prometheus", [(b"authorization", b"Bearer key")])
+    assert status == 200
+    assert b"# TYPE" in body
+
+
+def test_prometheus_is_closed_without_token(monkeypatch):
+    settings = get_settings().app
+    monkeypatch.setattr(settings, "metrics_token", "")
+    monkeypatch.setattr(settings, "key", "")
+
+    assert request("/internal/prometheus", [(b"authorization", b"Bearer ")])[0] == 403
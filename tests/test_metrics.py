@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import instrument_engine, RequestStats, REQUEST_STATS
+
+
+def test_failed_statement_leaves_no_timing_behind():
+    engine = create_engine("sqlite://")
+    instrument_engine(SimpleNamespace(sync_engine=engine), "test")
+
+    stats = RequestStats("test")
+    token = REQUEST_STATS.set(stats)
+
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing"))
+
+            connection.execute(text("SELECT 1"))
+
+            assert "query_started" not in connection.info
+
+    finally:
+        REQUEST_STATS.reset(token)
+
+    assert stats.queries == 1
+    assert 0 <= stats.db_seconds < 1
@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+
+import brotli
+from starlette.responses import JSONResponse, StreamingResponse
+
+from app.middlewares import CheckAuthMiddleware, CompressionMiddleware
+
+
+PAYLOAD = {"events": [{"id": i, "title": f"Event {i}"} for i in range(200)]}
+
+
+async def json_app(scope, receive, send):
+    await JSONResponse(PAYLOAD)(scope, receive, send)
+
+
+async def streaming_app(scope, receive, send):
+    async def chunks():
+        for i in range(4):
+            yield f'{{"chunk": {i}}}\n'.encode() * 100
+
+    await StreamingResponse(chunks(), media_type="application/x-ndjson")(scope, receive, send)
+
+
+def request(app, accept_encoding: str) -> tuple[dict, bytes]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+    disconnect = asyncio.Event()
+
+    async def receive():
+        # a connected client, streaming responses watch for a disconnect
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(CompressionMiddleware(app)(scope, receive, send))
+
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body
+
+
+def test_brotli_round_trip():
+    headers, body = request(json_app, "gzip, br")
+
+    assert headers["content-encoding"] == "br"
+    assert int(headers["content-length"]) == len(body)
+    assert brotli.decompress(body) == JSONResponse(PAYLOAD).body
+
+
+def test_streamed_brotli_round_trip():
+    headers, body = request(streaming_app, "br")
+
+    assert headers["content-encoding"] == "br"
+    assert "content-length" not in headers
+    assert brotli.decompress(body) == b"".join(f'{{"chunk": {i}}}\n'.encode() * 100 for i in range(4))
+
+
+def test_gzip_when_brotli_is_not_accepted():
+    headers, body = request(json_app, "gzip, br;q=0")
+
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == JSONResponse(PAYLOAD).body
+
+
+def test_public_paths_are_anchored():
+    middleware = CheckAuthMiddleware(json_app)
+
+    def is_public(path: str, method: str = "GET", root_path: str = "") -> bool:
+        return middleware.is_public({"path": path, "method": method, "root_path": root_path})
+
+    assert is_public("/docs")
+    assert is_public("/internal/prometheus")
+    assert is_public("/album/image.jpg")
+    assert is_public("/api/event/album/image.jpg", root_path="/api/event")
+
+    assert not is_public("/event/docs")
+    assert not is_public("/event/internal/prometheus")
+    assert not is_public("/event/album/image.jpg")
+    assert not is_public("/album/image.jpg", method="PUT")
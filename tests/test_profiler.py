@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import select, insert
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.model import Event, SearchQuery
+from app.profiler import fingerprint
+
+
+def compile_asyncpg(statement) -> str:
+    # the statement text the engine hands to asyncpg, with expanded IN lists
+    return str(statement.compile(
+        dialect=asyncpg.dialect(),
+        compile_kwargs={"render_postcompile": True}
+    ))
+
+
+def test_in_lists_of_any_length_share_a_fingerprint():
+    statements = [
+        compile_asyncpg(select(Event.id).where(Event.id.in_(ids)))
+        for ids in ([1, 2], [1, 2, 3], list(range(50)))
+    ]
+
+    assert "$2::INTEGER" in statements[0]
+    assert len({fingerprint(statement) for statement in statements}) == 1
+
+
+def test_timestamp_casts_are_collapsed():
+    moments = [datetime(2026, 1, day, tzinfo=timezone.utc) for day in range(1, 4)]
+    statements = [
+        compile_asyncpg(select(Event.id).where(Event.starting_time.in_(moments[:size])))
+        for size in (2, 3)
+    ]
+
+    assert fingerprint(statements[0]) == fingerprint(statements[1])
+
+
+def test_multi_row_values_share_a_fingerprint():
+    statements = [
+        compile_asyncpg(insert(SearchQuery).values([
+            {"user_id": str(i), "value": "query"}
+            for i in range(size)
+        ]))
+        for size in (2, 5)
+    ]
+
+    assert fingerprint(statements[0]) == fingerprint(statements[1])
+
+
+def test_different_filters_keep_different_fingerprints():
+    by_id = compile_asyncpg(select(Event.id).where(Event.id == 1))
+    by_title = compile_asyncpg(select(Event.id).where(Event.title == "title"))
+
+    assert fingerprint(by_id) != fingerprint(by_title)
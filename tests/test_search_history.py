@@ -0,0 +1,46 @@
+import asyncio
+
+from app.search_history import SearchHistoryRecorder, MAX_BATCH_SIZE
+
+
+class RecordingRecorder(SearchHistoryRecorder):
+    def __init__(self):
+        SearchHistoryRecorder.__init__(self)
+        self.batches = []
+
+    async def flush(self, batch):
+        # a slow write, stop must wait for it instead of cancelling it
+        await asyncio.sleep(0.05)
+        self.batches.append(batch)
+
+
+def test_stop_flushes_everything_queued():
+    async def scenario():
+        recorder = RecordingRecorder()
+        recorder.batch_size = 3
+        recorder.start()
+
+        for i in range(8):
+            recorder.record("user", f"query {i}")
+
+        await asyncio.sleep(0.01)
+        await recorder.stop()
+
+        return recorder.batches
+
+    batches = asyncio.run(scenario())
+
+    assert [value for batch in batches for _, value in batch] == [f"query {i}" for i in range(8)]
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_batch_size_stays_under_the_bind_parameter_limit():
+    recorder = SearchHistoryRecorder()
+
+    assert recorder.batch_size <= MAX_BATCH_SIZE
+    assert MAX_BATCH_SIZE * 2 <= 32767
+
+
+def test_flush_skips_queries_without_user():
+    # never reaches the database, which is not running here
+    asyncio.run(SearchHistoryRecorder().flush([(None, "query")]))
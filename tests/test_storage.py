@@ -0,0 +1,47 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app.storage import render_derivatives
+
+
+def write_png(path: str, size: int = 64) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), "red").save(buffer, format="PNG")
+    with open(path, "wb") as file:
+        file.write(buffer.getvalue())
+
+    return buffer.getvalue()
+
+
+def test_render_derivatives(tmp_path):
+    source = str(tmp_path / "image.png")
+    write_png(source)
+    target = str(tmp_path / "image.thumb.webp")
+
+    assert render_derivatives(source, [(target, 16)], 80)
+    with Image.open(target) as image:
+        assert image.size == (16, 16)
+
+
+def test_undecodable_image_is_rejected(tmp_path):
+    source = str(tmp_path / "image.png")
+    data = write_png(source)
+    with open(source, "wb") as file:
+        file.write(data[:len(data) // 2])
+
+    assert not render_derivatives(source, [(str(tmp_path / "image.thumb.webp"), 16)], 80)
+
+
+def test_io_error_is_raised(tmp_path):
+    source = str(tmp_path / "image.png")
+    write_png(source)
+    # the target directory is missing, saving fails with a real I/O error
+    target = str(tmp_path / "missing" / "image.thumb.webp")
+
+    with pytest.raises(OSError):
+        render_derivatives(source, [(target, 16)], 80)
+
+    assert not os.path.exists(os.path.dirname(target))